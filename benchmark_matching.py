@@ -0,0 +1,114 @@
+"""Compare keyword matching modes for speed and for model accuracy
+
+    python3 benchmark_matching.py labeled_dataset.csv
+
+extracts features from every message with the original per-keyword
+substring test, the substring automaton and the token matcher, reporting
+messages per second for each. It then trains the usual random forest on
+substring and on token features and prints test-set accuracy, scam
+precision/recall and the keyword hits the token mode drops (such as "now"
+inside "know"). Pass --pack to benchmark a pack other than the served one.
+"""
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+import feature_extractor
+from feature_extractor import FACTOR_NAMES, KeywordPack
+from keyword_matcher import KeywordAutomaton, TokenMatcher
+from training_data import iter_labeled_chunks
+
+
+def load_dataset(path):
+    messages, labels = [], []
+    for chunk_messages, chunk_labels in iter_labeled_chunks(path):
+        messages += chunk_messages
+        labels.append(chunk_labels)
+    return messages, np.concatenate(labels)
+
+
+def naive_substring_features(pack, messages):
+    """Features the way the original score_from_keywords computed them"""
+    out = np.empty((len(messages), len(pack.keywords)), dtype=np.float32)
+    for i, message in enumerate(messages):
+        message_lower = message.lower().translate(feature_extractor._NORMALIZE)
+        out[i] = [round(sum(1 for kw in keywords if kw in message_lower) / len(keywords), 2)
+                  for keywords in pack.keywords]
+    return out
+
+
+def _rate(extract, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        features = extract(messages)
+        best = min(best, time.perf_counter() - started)
+    return features, len(messages) / best
+
+
+def _evaluate(features, labels):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import precision_recall_fscore_support
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=42)
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+    predictions = model.predict(X_test)
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, predictions, average="binary", zero_division=0)
+    return {
+        "accuracy": float(np.mean(predictions == y_test)),
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(f1),
+    }
+
+
+def dropped_hits(pack, messages, top=10):
+    """Keywords the substring scan finds that are not whole-word matches, most frequent first"""
+    substring = KeywordAutomaton(kw for keywords in pack.keywords for kw in keywords)
+    token = TokenMatcher(substring.keywords)
+    dropped = Counter()
+    for message in messages:
+        text = message.lower().translate(feature_extractor._NORMALIZE)
+        for keyword_id in substring.find(text) - token.find(text):
+            dropped[substring.keywords[keyword_id]] += 1
+    return dropped.most_common(top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark substring vs token keyword matching")
+    parser.add_argument("dataset", nargs="?", default="labeled_dataset.csv")
+    parser.add_argument("--pack", default=feature_extractor.PACK_PATH, help="keyword pack file (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per mode; the best is reported")
+    parser.add_argument("--no-accuracy", action="store_true", help="only measure extraction speed")
+    args = parser.parse_args()
+
+    messages, labels = load_dataset(args.dataset)
+    base = KeywordPack.load(args.pack)
+    factors = dict(zip(FACTOR_NAMES, (list(keywords) for keywords in base.keywords)))
+    packs = {mode: KeywordPack(factors, version=base.version, match=mode) for mode in ("substring", "token")}
+    tokens = sum(len(message.split()) for message in messages)
+    print(f"📂 {len(messages)} messages, ~{tokens / len(messages):.0f} words each, "
+          f"{sum(len(k) for k in base.keywords)} keywords")
+
+    naive, naive_rate = _rate(lambda batch: naive_substring_features(base, batch), messages, 1)
+    print(f"⏱️ naive substring tests: {naive_rate:10,.0f} messages/s")
+    features = {}
+    for mode, pack in packs.items():
+        features[mode], rate = _rate(pack.score_batch, messages, args.repeat)
+        print(f"⏱️ {mode + ' matcher:':23} {rate:10,.0f} messages/s ({rate / naive_rate:.1f}x naive)")
+    assert np.array_equal(naive, features["substring"]), "substring automaton disagrees with substring tests"
+
+    changed = np.any(features["substring"] != features["token"], axis=1)
+    print(f"\n🔀 Token mode changes the features of {int(changed.sum())} messages ({changed.mean():.1%})")
+    print("   Most frequent substring-only hits: " +
+          ", ".join(f"{keyword!r} x{count}" for keyword, count in dropped_hits(base, messages)))
+
+    if not args.no_accuracy:
+        print()
+        for mode in packs:
+            scores = _evaluate(features[mode], labels)
+            print(f"📊 {mode:9}  accuracy {scores['accuracy']:.2%}  precision {scores['precision']:.2%}  "
+                  f"recall {scores['recall']:.2%}  f1 {scores['f1']:.3f}")
@@ -0,0 +1,219 @@
+"""Columnar binary copy of the labeled corpus, opened with mmap instead of parsed
+
+    python3 columnar_dataset.py labeled_dataset.csv labeled_dataset.scamds
+
+converts the CSV once; ColumnarDataset.open() then maps the file, so a
+training run starts without CSV parsing and only touches the pages of the
+columns it reads. All integers are little-endian. The file starts with a
+128-byte header, zero padded:
+
+    offset  size  field
+    0       8     magic b"SCAMDSET"
+    8       4     format version, uint32 (currently 1)
+    12      4     number of factor columns, uint32
+    16      8     number of rows, uint64
+    24      8     size of the message text in bytes, uint64
+    32      8     size of the metadata JSON in bytes, uint64
+    40      32    SHA-256 of everything after the header
+
+followed by the message text and these arrays, each starting at a 64-byte
+aligned file offset, and finally the UTF-8 metadata JSON (column names,
+source file):
+
+    text          uint8[text bytes]      every message, UTF-8, back to back
+    offsets       uint64[rows + 1]       message i is text[offsets[i]:offsets[i + 1]]
+    labels        int8[rows]             1 where the label column is "scam", else 0
+    factors       float32[rows, factors] the precomputed factor columns (NaN if not numeric)
+    score_labels  int8[rows]             the numeric label written by label_dataset.py (-1 if absent)
+
+Readers must reject unknown versions.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import struct
+import time
+from array import array
+
+import numpy as np
+
+from forest_engine import read_sections, write_sections
+
+FORMAT_MAGIC = b"SCAMDSET"
+FORMAT_VERSION = 1
+HEADER_SIZE = 128
+_HEADER = struct.Struct("<8sIIQQQ32s")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+
+def csv_columns(header):
+    """(message column, label column, minimum row width) for a labeled CSV header
+
+    The message is the "message" column (else the first) and the label the
+    first "label" column (else the second).
+    """
+    message_column = header.index("message") if "message" in header else 0
+    label_column = header.index("label") if "label" in header else 1
+    return message_column, label_column, max(message_column, label_column) + 1
+
+
+def is_scam(label):
+    """Whether a label cell marks a scam ("scam", any case)"""
+    return label.lower() == "scam"
+
+
+def is_columnar(path):
+    """Whether path is a columnar dataset file rather than a CSV"""
+    with open(path, "rb") as f:
+        return f.read(len(FORMAT_MAGIC)) == FORMAT_MAGIC
+
+
+def convert_csv(csv_path, path):
+    """Write the labeled CSV at csv_path as a columnar dataset at path; returns the row count
+
+    Message and label are found by csv_columns(). The score_label column,
+    or a later "label" column, is kept as score_labels and every other
+    column as a factor. Message text is streamed to disk as it is read; only the
+    fixed-width columns are held in memory. The file is written to a
+    temporary name and renamed.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    digest = hashlib.sha256()
+    with open(csv_path, newline="", encoding="utf-8") as src, open(tmp_path, "wb") as out:
+        reader = csv.reader(src)
+        header = next(reader, [])
+        message_column, label_column, width = csv_columns(header)
+        # label_dataset.py writes score_label; older versions added a second "label"
+        score_column = header.index("score_label") if "score_label" in header else next(
+            (i for i, name in enumerate(header) if name == "label" and i != label_column), None)
+        factor_columns = [i for i in range(len(header)) if i not in (message_column, label_column, score_column)]
+
+        def write(data):
+            digest.update(data)
+            out.write(data)
+
+        out.write(bytes(HEADER_SIZE))
+        offsets, labels, score_labels = array("Q", [0]), array("b"), array("b")
+        factors = array("f")
+        text_size = 0
+        for row in reader:
+            if len(row) < width:
+                continue  # blank or truncated line
+            encoded = row[message_column].encode("utf-8")
+            write(encoded)
+            text_size += len(encoded)
+            offsets.append(text_size)
+            labels.append(is_scam(row[label_column]))
+            factors.extend(_number(row[i]) if i < len(row) else float("nan") for i in factor_columns)
+            score = _number(row[score_column]) if score_column is not None and score_column < len(row) else float("nan")
+            score_labels.append(int(score) if score == score else -1)
+
+        write_sections(write, HEADER_SIZE + text_size, [
+            np.frombuffer(column, dtype=column.typecode).astype({"Q": "<u8", "b": "<i1", "f": "<f4"}[column.typecode])
+            for column in (offsets, labels, factors, score_labels)
+        ])
+        meta = {
+            "source": os.path.basename(csv_path),
+            "message_column": header[message_column] if header else None,
+            "factor_columns": [header[i] for i in factor_columns],
+            "has_score_labels": score_column is not None,
+        }
+        meta_bytes = json.dumps(meta, sort_keys=True).encode("utf-8")
+        write(meta_bytes)
+
+        out.seek(0)
+        out.write(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, len(factor_columns), len(labels),
+                               text_size, len(meta_bytes), digest.digest()))
+    os.replace(tmp_path, path)
+    return len(labels)
+
+
+class ColumnarDataset:
+    """A columnar dataset file mapped into memory
+
+    offsets, labels, factors and score_labels are read-only NumPy views of
+    the file; messages are decoded only when asked for.
+    """
+
+    def __init__(self, path, text, offsets, labels, factors, score_labels, meta):
+        self.path = path
+        self.text = text
+        self.offsets = offsets
+        self.labels = labels
+        self.factors = factors
+        self.score_labels = score_labels
+        self.meta = meta
+        self.factor_names = meta.get("factor_columns", [])
+
+    @classmethod
+    def open(cls, path, verify=False):
+        """Map a file written by convert_csv(); raises ValueError if it is not one
+
+        verify=True checks the payload checksum, which reads the whole file.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a columnar dataset")
+        magic, version, n_factors, n_rows, text_size, meta_size, sha256 = _HEADER.unpack_from(header)
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"{path} is not a columnar dataset")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses dataset format version {version}, expected {FORMAT_VERSION}")
+
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        if verify and hashlib.sha256(data[HEADER_SIZE:]).digest() != sha256:
+            raise ValueError(f"Checksum mismatch in {path}")
+
+        text = data[HEADER_SIZE:HEADER_SIZE + text_size]
+        offsets, labels, factors, score_labels = read_sections(
+            path, data, HEADER_SIZE + text_size,
+            (("<u8", n_rows + 1), ("<i1", n_rows), ("<f4", n_rows * n_factors), ("<i1", n_rows)),
+            trailing=meta_size,
+        )
+        meta = json.loads(bytes(data[len(data) - meta_size:]).decode("utf-8"))
+        return cls(path, text, offsets, labels, factors.reshape(n_rows, n_factors), score_labels, meta)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def message(self, i):
+        return bytes(self.text[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def messages(self, start=0, stop=None):
+        """Decode messages start..stop with a single copy out of the mapping"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        bounds = self.offsets[start:stop + 1].astype(np.int64)
+        blob = bytes(self.text[bounds[0]:bounds[-1]])
+        bounds -= bounds[0]
+        return [blob[a:b].decode("utf-8") for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+    def iter_chunks(self, chunk_size):
+        """Yield (messages, labels) for up to chunk_size rows at a time"""
+        for start in range(0, len(self), chunk_size):
+            yield self.messages(start, start + chunk_size), np.array(self.labels[start:start + chunk_size])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a labeled CSV into the columnar dataset format")
+    parser.add_argument("csv", nargs="?", default="labeled_dataset.csv")
+    parser.add_argument("output", nargs="?", help="default: the CSV path with a .scamds extension")
+    parser.add_argument("--verify", action="store_true", help="re-open the result and check its checksum")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.csv)[0] + ".scamds"
+    started = time.perf_counter()
+    rows = convert_csv(args.csv, output)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {rows:,} rows to {output} ({os.path.getsize(output) / 2**20:.1f} MiB) in {elapsed:.2f}s")
+    if args.verify:
+        dataset = ColumnarDataset.open(output, verify=True)
+        print(f"🔍 Checksum OK, factors: {', '.join(dataset.factor_names)}")
@@ -1,152 +1,355 @@
-from flask import Flask, request, jsonify, render_template_string
-import joblib
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 import os
-import csv
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+import hmac
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError as BatchTimeout
+import feature_extractor
+from feature_extractor import (
+    N_FEATURES, KeywordPack, KeywordPackWatcher, assign_values_to_factors, check_schema,
+    extract_features_batch, schema_meta
+)
+from forest_engine import FlatForest, _sidecar_meta, export_forest, file_sha256, load_mapped
+from micro_batcher import MicroBatcher, QueueFull
+from json_stream import iter_json_array, iter_ndjson
+from prediction_cache import PredictionCache
+from persistent_cache import PersistentPredictionCache
+from model_registry import ModelRegistry, RegistryError, RegistryWatcher
+from memory_report import rss_report
+from static_pages import CompiledPage
 
 app = Flask(__name__)
 
-# Initialize model as None - will be loaded when needed
-model = None
-
-def assign_values_to_factors(message):
-    """Extract feature scores from message text"""
-    message_lower = message.lower()
-
-    def score_from_keywords(keywords):
-        return sum(1 for kw in keywords if kw in message_lower) / len(keywords)
-
-    urgency_keywords = [
-        "urgent", "immediately", "asap", "now", "instantly", "right away", "critical",
-        "emergency", "act fast", "without delay", "rush", "time sensitive", "immediate attention",
-        "important", "priority", "respond quickly", "final notice", "quickly", "within hours", "last chance"
-    ]
-
-    money_keywords = [
-        "send money", "payment", "bank account", "transfer", "fund", "financial assistance",
-        "deposit", "remit", "wire", "moneygram", "western union", "btc", "crypto", "currency",
-        "dollars", "cash", "fee", "transaction", "cheque", "inheritance", "unclaimed funds", "reward",
-        "$", "million", "billion", "usd", "50m", "50 million", "50$", "50000", "lot of money", "wealth"
-    ]
-
-    official_keywords = [
-        "official", "government", "irs", "fbi", "customs", "account update", "verification",
-        "authority", "compliance", "legal", "investigation", "officer", "department", "administrator",
-        "state", "national", "hq", "regulation", "policy", "internal audit"
-    ]
-
-    reward_keywords = [
-        "win", "congratulations", "lucky", "jackpot", "lottery", "cash prize", "gift card",
-        "you've won", "sweepstakes", "bingo", "claim prize", "million", "billion", "bonanza",
-        "reward", "exclusive prize", "you qualify", "redeem", "receive funds", "special winner"
-    ]
-
-    celebrity_keywords = [
-        "elon musk", "taylor swift", "jeff bezos", "bill gates", "oprah", "lebron", "cristiano",
-        "selena", "beyonce", "trump", "biden", "modi", "virat", "shahrukh", "kardashian", 
-        "celebrity", "hollywood", "influencer", "verified", "blue tick"
-    ]
-
-    grammar_issues_keywords = [
-        "recieve", "seperated", "definately", "adress", "freind", "untill", "wich", "immediatly",
-        "inconvienent", "completly", "alot", "happend", "beleive", "enviroment", "goverment",
-        "neccessary", "occurence", "seperate", "succesful", "truely"
-    ]
-
-    contact_keywords = [
-        "telegram", "whatsapp", "sms", "text", "chat", "dm", "message me", "contact via app",
-        "reach me", "wechat", "imo", "viber", "signal", "messenger", "snapchat", "facebook",
-        "call this number", "ping me", "alternative number", "line"
-    ]
-
-    pressure_keywords = [
-        "act now", "limited time", "only today", "last chance", "hurry", "urgent deadline",
-        "before it's too late", "don't miss out", "one-time offer", "expires soon",
-        "final offer", "time running out", "claim fast", "do not delay", "fast response",
-        "limited stock", "urgent response needed", "need quick answer", "instantly confirm", "must act quickly"
-    ]
-
-    link_keywords = [
-        "http", "https", "bit.ly", "tinyurl", "shorturl", "redirect", ".xyz", ".top", ".win",
-        "click here", "open link", "see details", "login page", "promo code", "verify link",
-        "security page", "unusual login", "confirm access", "track order", "claim voucher"
-    ]
-
-    upfront_keywords = [
-        "pay upfront", "advance payment", "initial deposit", "send fee", "registration fee", 
-        "processing charge", "application cost", "service fee", "transfer cost", "one-time charge",
-        "security fee", "membership fee", "setup cost", "handling fee", "deposit first",
-        "pay before", "cash advance", "shipping fee", "booking charge", "consultation fee"
-    ]
-
-    return [
-        round(score_from_keywords(urgency_keywords), 2),
-        round(score_from_keywords(money_keywords), 2),
-        round(score_from_keywords(official_keywords), 2),
-        round(score_from_keywords(reward_keywords), 2),
-        round(score_from_keywords(celebrity_keywords), 2),
-        round(score_from_keywords(grammar_issues_keywords), 2),
-        round(score_from_keywords(contact_keywords), 2),
-        round(score_from_keywords(pressure_keywords), 2),
-        round(score_from_keywords(link_keywords), 2),
-        round(score_from_keywords(upfront_keywords), 2)
-    ]
-
-def load_and_train_model():
-    """Load data and train model if not already trained"""
-    global model
+# Flat-array compilation of the served model - None until it is loaded
+engine = None
+# Optional micro-batching scheduler for concurrent /predict calls
+batcher = None
+
+# LRU cache of /predict results, keyed by message hash, model checksum and keyword pack
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("SCAM_DETECTOR_CACHE_ENTRIES", "10000")),
+    max_bytes=int(os.environ.get("SCAM_DETECTOR_CACHE_BYTES", str(32 * 1024 * 1024))),
+)
+
+# Optional on-disk cache behind prediction_cache that survives restarts
+persistent_cache = None
+_persistent_warm_entries = 0
+
+# Optional versioned model registry; workers follow its ACTIVE pointer
+model_registry = None
+registry_watcher = None
+# Registry version of the served model (None when not served from a registry)
+served_version = None
+_swap_lock = threading.Lock()
+# Optional watcher that reloads the keyword pack file when it changes
+keyword_watcher = None
+
+# Progress of the background load/train started by start_background_training
+training_status = {'state': 'idle', 'stage': None, 'progress': 0.0, 'error': None,
+                   'started_at': None, 'finished_at': None}
+_training_lock = threading.Lock()
+TRAINING_CHUNK_SIZE = 10000
+# A labeled CSV or its columnar copy from columnar_dataset.py
+DATASET_PATH = os.environ.get("SCAM_DETECTOR_DATASET", "labeled_dataset.csv")
+# Seconds clients are told to wait while no model is published yet
+RETRY_AFTER_SECONDS = 5
+# Seconds clients are told to wait when the micro-batcher is saturated
+BUSY_RETRY_AFTER_SECONDS = 1
+# Rounds of synthetic predictions run before /health/ready reports ready
+WARMUP_ROUNDS = int(os.environ.get("SCAM_DETECTOR_WARMUP", "20"))
+warmed_up = False
+
+# Static pages, rendered and compressed once by compile_pages()
+PAGE_MAX_AGE = int(os.environ.get("SCAM_DETECTOR_PAGE_MAX_AGE", "300"))
+_pages = {}
+_pages_lock = threading.Lock()
+
+# Messages scored per model call by /predict_batch; bounds its memory use
+PREDICT_BATCH_CHUNK_SIZE = 256
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+def publish_model(new_model, version=None):
+    """Compile new_model for fast inference and make it the served model"""
+    publish_engine(FlatForest.from_sklearn(new_model), version=version)
+
+def publish_engine(new_engine, version=None):
+    """Make new_engine the served model
+
+    The engine is fully built before the single assignment that publishes it,
+    and request handlers pin one engine per request, so a swap is atomic.
+    """
+    global engine, served_version
+    engine = new_engine
+    served_version = version
+    # Keys embed the model checksum, so old entries could never hit again
+    prediction_cache.clear()
+    if persistent_cache is not None:
+        _warm_from_persistent_cache()
+
+def _cache_version(current_engine, pack):
+    """Cache namespace for results computed by this engine on this keyword pack's features"""
+    return f"{current_engine.checksum}:{pack.sha256[:16]}"
+
+def swap_keyword_pack(pack):
+    """Make pack the served keyword pack and drop results computed with the old one
+
+    Requests pin one pack for their whole extraction, so the swap never
+    pauses serving or mixes keywords from two packs in one result.
+    """
+    with _swap_lock:
+        current = feature_extractor.current_pack()
+        if (pack.sha256, pack.version) == (current.sha256, current.version):
+            return False
+        # Score a few messages first so the new automaton's tables are paged in
+        pack.score_batch(WARMUP_MESSAGES)
+        feature_extractor.set_pack(pack)
+        prediction_cache.clear()
+        if persistent_cache is not None and engine is not None:
+            _warm_from_persistent_cache()
+    print(f"🔑 Now using keyword pack version {pack.version} ({pack.sha256[:12]})")
+    return True
+
+def reload_keyword_pack(path=None):
+    """Load the keyword pack file again and swap it in if it changed; returns the served pack"""
+    swap_keyword_pack(KeywordPack.load(path or feature_extractor.current_pack().path or feature_extractor.PACK_PATH))
+    return feature_extractor.current_pack()
+
+def start_keyword_watcher(poll_interval=2.0):
+    global keyword_watcher
+    keyword_watcher = KeywordPackWatcher(
+        feature_extractor.current_pack().path or feature_extractor.PACK_PATH, reload_keyword_pack, interval=poll_interval
+    ).start()
+
+def _model_unavailable():
+    """503 response telling clients when to retry while no model is published"""
+    response = jsonify({'error': 'Model not available yet', 'training': dict(training_status)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
+def _server_busy():
+    """503 response for a request the micro-batcher could not take or answer in time"""
+    response = jsonify({'error': 'Server busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER_SECONDS)
+    return response
+
+def _switch_to_version(version):
+    """Load a registry version and swap it in, unless it is already being served"""
+    with _swap_lock:
+        if version == served_version:
+            return
+        new_engine = model_registry.load_engine(version)
+        # Pay the new model's cold-start cost before it takes traffic
+        warmup(target=new_engine)
+        publish_engine(new_engine, version=version)
+    print(f"🔄 Now serving model {version}")
+
+def enable_model_registry(root, poll_interval=1.0, watch=True):
+    """Serve models from a registry directory and hot-swap when its ACTIVE pointer moves"""
+    global model_registry
+    model_registry = ModelRegistry(root, check_meta=check_schema)
+    if watch:
+        start_registry_watcher(poll_interval)
+
+def start_registry_watcher(poll_interval=1.0):
+    global registry_watcher
+    registry_watcher = RegistryWatcher(
+        model_registry, _switch_to_version, interval=poll_interval, current=served_version
+    ).start()
+
+def _predict_rows(current_engine, X):
+    """Score a batch of feature rows with the engine their requests were pinned to"""
+    return current_engine.predict(X)
+
+def enable_micro_batching(max_batch_size=32, max_wait=0.002, max_queue=1024):
+    """Route /predict through a MicroBatcher that scores concurrent requests together"""
+    global batcher
+    batcher = MicroBatcher(
+        _predict_rows, N_FEATURES,
+        max_batch_size=max_batch_size, max_wait=max_wait, max_queue=max_queue
+    )
+
+def enable_persistent_cache(path, warm_entries=1000):
+    """Read /predict results through a SQLite cache, warming the LRU from its hottest entries"""
+    global persistent_cache, _persistent_warm_entries
+    _persistent_warm_entries = warm_entries
+    persistent_cache = PersistentPredictionCache(path)
+    if engine is not None:
+        _warm_from_persistent_cache()
+
+def _warm_from_persistent_cache():
+    cache_version = _cache_version(engine, feature_extractor.current_pack())
+    persistent_cache.prune(cache_version)
+    for key, result in persistent_cache.warm(cache_version, _persistent_warm_entries):
+        prediction_cache.put(key, result)
+
+def _set_training_status(**fields):
+    with _training_lock:
+        training_status.update(fields)
+
+def _report_progress(stage, progress):
+    _set_training_status(stage=stage, progress=round(progress, 3))
+
+def _fit_dummy_model():
+    """Fit a placeholder model so the demo can still answer requests"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    dummy_model = RandomForestClassifier(n_estimators=100, random_state=42)
+    dummy_features = [[0.1, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]]
+    dummy_labels = [0]
+    dummy_model.fit(dummy_features, dummy_labels)
+    return dummy_model
+
+def _save_model_atomically(new_model, path):
+    """Write the model next to path and rename it into place, so readers never see a partial file"""
+    import joblib
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(new_model, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_and_train_model(progress=_report_progress):
+    """Load data and train model if not already trained
+
+    progress(stage, fraction) is called as each stage advances; fraction runs
+    from 0 to 1 over the whole load or training run.
+    """
+    # In registry mode serve the active version, importing a legacy pickle
+    # as the first version if the registry is still empty
+    if model_registry is not None:
+        try:
+            version = model_registry.active_version()
+            if version is None and os.path.exists("scam_detector_model.pkl"):
+                # Only a pickle whose sidecar names it carries the schema the registry checks
+                sidecar = _sidecar_meta("scam_detector_model.pkl", file_sha256("scam_detector_model.pkl"))
+                if sidecar is not None:
+                    version = model_registry.publish_file("scam_detector_model.pkl", **{
+                        **sidecar, "source": "scam_detector_model.pkl"})
+                else:
+                    print("⚠️ scam_detector_model.pkl has no matching .meta.json, not importing it")
+            if version is not None:
+                progress("loading model", 0.0)
+                rss_before = rss_report()
+                with _swap_lock:
+                    publish_engine(model_registry.load_engine(version), version=version)
+                progress("ready", 1.0)
+                print(f"✅ Loaded model {version} from registry {model_registry.root}")
+                print(f"📏 Memory before load {rss_before}, after {rss_report()}")
+                return
+        except Exception as e:
+            print(f"⚠️ Failed to load model from registry ({e}), will train new one")
     
-    # Try to load existing model first
-    if os.path.exists("scam_detector_model.pkl"):
+    # Try to load existing model first (a bare .forest file is enough to serve)
+    elif os.path.exists("scam_detector_model.pkl") or os.path.exists("scam_detector_model.forest"):
         try:
-            model = joblib.load("scam_detector_model.pkl")
-            print("✅ Loaded existing model from scam_detector_model.pkl")
+            progress("loading model", 0.0)
+            rss_before = rss_report()
+            # Serving only needs the compiled forest, memory-mapped so that all
+            # worker processes on a host share one copy of its node arrays
+            new_engine = load_mapped("scam_detector_model.pkl")
+            check_schema(new_engine.meta)
+            publish_engine(new_engine)
+            progress("ready", 1.0)
+            print("✅ Loaded existing model")
+            print(f"📏 Memory before load {rss_before}, after {rss_report()}")
             return
         except:
             print("⚠️ Failed to load existing model, will train new one")
     
     # Train new model if dataset exists
-    if os.path.exists("labeled_dataset.csv"):
+    if os.path.exists(DATASET_PATH):
         try:
-            with open("labeled_dataset.csv", newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                next(reader)  # Skip header
-                data = [row for row in reader]
-            
-            messages = [row[0] for row in data]
-            labels = [1 if row[1].lower() == "scam" else 0 for row in data]
-            features = [assign_values_to_factors(message) for message in messages]
+            # Training-only dependencies are imported here so serving processes never load them
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.model_selection import train_test_split
+            from feature_store import FeatureStore
+            from parallel_features import ParallelExtractor
+            from training_data import load_features
+
+            progress("reading dataset", 0.0)
+            # Features are streamed in chunks and take ~30% of the run, fitting the rest
+            extract = ParallelExtractor(int(os.environ.get("SCAM_DETECTOR_EXTRACT_WORKERS", "0")))
+            store_path = os.environ.get("SCAM_DETECTOR_FEATURE_STORE")
+            store = FeatureStore(store_path, compute=extract) if store_path else None
+            try:
+                features, labels = load_features(
+                    DATASET_PATH, store.extract if store else extract,
+                    chunk_size=TRAINING_CHUNK_SIZE,
+                    progress=lambda fraction: progress("extracting features", 0.05 + 0.25 * fraction),
+                )
+            finally:
+                extract.close()
+                if store is not None:
+                    print(f"🗃️ Feature store: {store.reused:,} rows reused, {store.extracted:,} extracted")
+                    store.close()
             
             X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=42)
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
+            # Growing the forest ten trees at a time with warm_start gives the
+            # same trees as one fit, and lets us report progress in between.
+            new_model = RandomForestClassifier(n_estimators=0, random_state=42, warm_start=True)
+            for n_estimators in range(10, 101, 10):
+                new_model.set_params(n_estimators=n_estimators)
+                new_model.fit(X_train, y_train)
+                progress("fitting forest", 0.3 + 0.65 * n_estimators / 100)
+            new_model.set_params(warm_start=False)
             
             # Save the model
-            joblib.dump(model, "scam_detector_model.pkl")
+            progress("saving model", 0.95)
+            if model_registry is not None:
+                version = model_registry.publish(new_model, source=DATASET_PATH, **schema_meta())
+                with _swap_lock:
+                    publish_model(new_model, version=version)
+            else:
+                _save_model_atomically(new_model, "scam_detector_model.pkl")
+                # Portable copy that inference-only nodes can load with NumPy alone
+                publish_engine(export_forest(new_model, "scam_detector_model.pkl", **schema_meta()))
+            progress("ready", 1.0)
             print("✅ Trained and saved new model")
             
             # Print accuracy
-            predictions = model.predict(X_test)
+            predictions = new_model.predict(X_test)
             print(f"📊 Model accuracy on test set: {sum(predictions == y_test) / len(y_test):.2%}")
             
         except Exception as e:
             print(f"❌ Error training model: {e}")
             # Create a dummy model for demo purposes
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            # Train on some dummy data
-            dummy_features = [[0.1, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]]
-            dummy_labels = [0]
-            model.fit(dummy_features, dummy_labels)
+            publish_model(_fit_dummy_model())
+            progress("ready", 1.0)
             print("⚠️ Created dummy model for demo purposes")
     else:
-        print("⚠️ No labeled_dataset.csv found, creating dummy model")
+        print(f"⚠️ No {DATASET_PATH} found, creating dummy model")
         # Create a dummy model for demo purposes
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        dummy_features = [[0.1, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]]
-        dummy_labels = [0]
-        model.fit(dummy_features, dummy_labels)
+        publish_model(_fit_dummy_model())
+        progress("ready", 1.0)
+
+def _background_training():
+    try:
+        load_and_train_model()
+        _report_progress("warming up", 1.0)
+        warmup()
+        _set_training_status(state='ready', stage='ready', finished_at=time.time())
+    except Exception as e:
+        _set_training_status(state='failed', error=str(e), finished_at=time.time())
+        print(f"❌ Background model loading failed: {e}")
+
+def start_background_training():
+    """Load or train the model on a worker thread so the server can start serving at once
+
+    Until a model is published, /predict answers 503 with Retry-After and
+    /health reports the training stage and progress. /health/ready answers
+    503 until the model has also been warmed up.
+    """
+    with _training_lock:
+        if training_status['state'] == 'running':
+            return None
+        training_status.update(state='running', stage='starting', progress=0.0,
+                               error=None, started_at=time.time(), finished_at=None)
+    thread = threading.Thread(target=_background_training, name='model-training', daemon=True)
+    thread.start()
+    return thread
 
 DETECT_SCAMS_TEMPLATE = '''
 <!DOCTYPE html>
@@ -1781,20 +1984,128 @@ ABOUT_TEMPLATE = '''
 </html>
 '''
 
+WARMUP_MESSAGES = [
+    "URGENT: your bank account is suspended, verify at http://bit.ly/secure-login now",
+    "Congratulations! You've won a $1,000,000 lottery prize, pay the processing fee to claim",
+    "Elon Musk crypto giveaway, send btc and receive double, limited time offer",
+    "Hi, are we still meeting for lunch tomorrow at noon?",
+    "Your order has shipped and will arrive on Thursday.",
+]
+
+def warmup(rounds=None, target=None):
+    """Run synthetic messages through feature extraction and a model
+
+    Pays for lazy imports, first-touch memory and cold caches up front instead
+    of on the first real requests. Call it in a pre-fork master so workers
+    inherit the warmed state. Without a target the served engine is warmed
+    and /health/ready starts reporting ready.
+    """
+    global warmed_up
+    rounds = WARMUP_ROUNDS if rounds is None else rounds
+    current_engine = engine if target is None else target
+    if current_engine is None:
+        return
+    if rounds <= 0:
+        warmed_up = warmed_up or target is None
+        return
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in WARMUP_MESSAGES:
+            current_engine.predict_one(assign_values_to_factors(message))
+        current_engine.predict(extract_features_batch(WARMUP_MESSAGES))
+    # Fault in every page of the (possibly memory-mapped) node arrays
+    for array in (current_engine.feature, current_engine.threshold, current_engine.left,
+                  current_engine.right, current_engine.leaf_proba):
+        array.sum()
+    if target is None:
+        # Also route one request through Flask so its first dispatch is not a real one
+        app.test_client().get('/health/live')
+        warmed_up = True
+    print(f"🔥 Warmed up with {rounds} rounds in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def start_worker_services():
+    """Start this process's background threads as configured by SCAM_DETECTOR_* variables
+
+    Threads and SQLite connections do not survive fork, so pre-fork servers
+    call this in every worker after forking rather than in the master.
+    """
+    if os.environ.get("SCAM_DETECTOR_MICRO_BATCH") == "1" and batcher is None:
+        enable_micro_batching(
+            max_batch_size=int(os.environ.get("SCAM_DETECTOR_BATCH_SIZE", "32")),
+            max_wait=float(os.environ.get("SCAM_DETECTOR_BATCH_WAIT_MS", "2")) / 1000,
+            max_queue=int(os.environ.get("SCAM_DETECTOR_BATCH_QUEUE", "1024")),
+        )
+        print(f"📦 Micro-batching enabled (batch size {batcher.max_batch_size}, wait {batcher.max_wait * 1000:g} ms)")
+    if os.environ.get("SCAM_DETECTOR_PERSISTENT_CACHE") and persistent_cache is None:
+        enable_persistent_cache(
+            os.environ["SCAM_DETECTOR_PERSISTENT_CACHE"],
+            warm_entries=int(os.environ.get("SCAM_DETECTOR_CACHE_WARM", "1000")),
+        )
+        print(f"💾 Persistent cache at {persistent_cache.path}")
+    if model_registry is not None and registry_watcher is None:
+        start_registry_watcher(float(os.environ.get("SCAM_DETECTOR_REGISTRY_POLL", "1")))
+    keyword_poll = float(os.environ.get("SCAM_DETECTOR_KEYWORD_POLL", "0"))
+    if keyword_poll > 0 and keyword_watcher is None:
+        start_keyword_watcher(keyword_poll)
+        print(f"🔑 Watching keyword pack {keyword_watcher.path}")
+
+def create_app(preload=True, start_services=True, warmup_rounds=None):
+    """WSGI application factory
+
+    With preload=True the model is loaded (or trained) before returning, so a
+    pre-fork server can call this once in its master and share the model with
+    its workers copy-on-write; pass start_services=False there and call
+    start_worker_services() in each worker. With preload=False the model loads
+    on a background thread while the app already serves /health.
+    """
+    compile_pages()
+    if os.environ.get("SCAM_DETECTOR_MODEL_REGISTRY") and model_registry is None:
+        enable_model_registry(os.environ["SCAM_DETECTOR_MODEL_REGISTRY"], watch=False)
+        print(f"🗂️ Serving models from registry {model_registry.root}")
+    if engine is None:
+        if preload:
+            print("📚 Loading model...")
+            _set_training_status(state='running', started_at=time.time())
+            load_and_train_model()
+            _report_progress("warming up", 1.0)
+            warmup(warmup_rounds)
+            _set_training_status(state='ready', stage='ready', finished_at=time.time())
+        else:
+            print("📚 Loading model in the background...")
+            start_background_training()
+    if start_services:
+        start_worker_services()
+    return app
+
+def compile_pages():
+    """Render the static pages once and build their compressed variants"""
+    with _pages_lock:
+        if _pages:
+            return
+        with app.app_context():
+            for name, template in (('home', HOME_TEMPLATE), ('detect_scams', DETECT_SCAMS_TEMPLATE),
+                                   ('about', ABOUT_TEMPLATE)):
+                _pages[name] = CompiledPage(render_template_string(template), max_age=PAGE_MAX_AGE)
+
+def _serve_page(name):
+    if not _pages:
+        compile_pages()
+    return _pages[name].response(request)
+
 @app.route('/')
 def home():
     """Serve the home page with scam research and statistics"""
-    return render_template_string(HOME_TEMPLATE)
+    return _serve_page('home')
 
 @app.route('/detect_scams')
 def detect_scams():
     """Serve the main web interface"""
-    return render_template_string(DETECT_SCAMS_TEMPLATE)
+    return _serve_page('detect_scams')
 
 @app.route('/about')
 def about():
     """Serve the about page"""
-    return render_template_string(ABOUT_TEMPLATE)
+    return _serve_page('about')
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -1807,42 +2118,230 @@ def predict():
             return jsonify({'error': 'No message provided'}), 400
         
         # Ensure model is loaded
-        if model is None:
-            return jsonify({'error': 'Model not available'}), 500
-        
-        # Extract features
-        features = [assign_values_to_factors(message)]
+        current_engine = engine
+        if current_engine is None:
+            return _model_unavailable()
+        pack = feature_extractor.current_pack()
         
-        # Make prediction
-        prediction = model.predict(features)[0]
-        prediction_proba = model.predict_proba(features)[0]
+        # Repeated messages (e.g. during a scam campaign) are answered from cache
+        cache_key = prediction_cache.key(message, _cache_version(current_engine, pack))
+        result = prediction_cache.get(cache_key)
+        if result is None and persistent_cache is not None:
+            result = persistent_cache.get(cache_key)
+            if result is not None:
+                prediction_cache.put(cache_key, result)
+        if result is not None:
+            return jsonify(result)
         
-        # Calculate confidence
-        confidence = round(max(prediction_proba) * 100, 1)
+        # Extract features
+        features = [pack.score(message)]
         
-        result = {
-            'prediction': 'SCAM' if prediction == 1 else 'NOT SCAM',
-            'confidence': confidence,
-            'features': features[0],
-            'message_length': len(message)
-        }
+        # Make prediction: label and probabilities from one forest traversal
+        if batcher is not None:
+            try:
+                prediction, prediction_proba = batcher.predict(features[0], current_engine, timeout=5)
+            except (QueueFull, BatchTimeout):
+                return _server_busy()
+        else:
+            prediction, prediction_proba = current_engine.predict_one(features[0])
         
+        result = _prediction_result(prediction, prediction_proba, features[0], message)
+        prediction_cache.put(cache_key, result)
+        if persistent_cache is not None:
+            persistent_cache.put(cache_key, result)
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Error processing request: {str(e)}'}), 500
 
+def _prediction_result(prediction, prediction_proba, features, message):
+    """Build the JSON result returned for one scored message"""
+    return {
+        'prediction': 'SCAM' if prediction == 1 else 'NOT SCAM',
+        'confidence': round(float(prediction_proba.max()) * 100, 1),
+        'features': features,
+        'message_length': len(message)
+    }
+
+def _score_batch_chunk(current_engine, pack, chunk):
+    """Score a chunk of (index, item) pairs with one model call, as NDJSON lines"""
+    messages = []
+    for _, item in chunk:
+        message = item.get('message', '') if isinstance(item, dict) else item
+        messages.append(message if isinstance(message, str) and message else None)
+    
+    valid = [message for message in messages if message is not None]
+    features = pack.score_batch(valid)
+    if valid:
+        labels, proba = current_engine.predict(features)
+    
+    lines = []
+    row = 0
+    for (index, _), message in zip(chunk, messages):
+        if message is None:
+            result = {'index': index, 'error': 'No message provided'}
+        else:
+            row_features = [round(value, 2) for value in features[row].tolist()]
+            result = {'index': index, **_prediction_result(labels[row], proba[row], row_features, message)}
+            row += 1
+        lines.append(json.dumps(result))
+    return '\n'.join(lines) + '\n'
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """Score a JSON array or NDJSON stream of messages, streaming NDJSON results in input order"""
+    # Pin the engine and keyword pack so a whole batch is scored the same way
+    current_engine = engine
+    pack = feature_extractor.current_pack()
+    if current_engine is None:
+        return _model_unavailable()
+    
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = iter_ndjson(request.stream)
+    else:
+        items = iter_json_array(request.stream)
+    
+    # Read the first item before streaming, so a body that does not even
+    # start as an array or NDJSON line is a 400 rather than a 200 error line
+    no_items = object()
+    try:
+        first = next(items, no_items)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid request body: {e}'}), 400
+    if first is not no_items:
+        items = itertools.chain([first], items)
+    
+    def generate():
+        chunk = []
+        try:
+            for index, item in enumerate(items):
+                chunk.append((index, item))
+                if len(chunk) == PREDICT_BATCH_CHUNK_SIZE:
+                    yield _score_batch_chunk(current_engine, pack, chunk)
+                    chunk = []
+        except ValueError as e:
+            if chunk:
+                yield _score_batch_chunk(current_engine, pack, chunk)
+            yield json.dumps({'error': f'Invalid request body: {e}'}) + '\n'
+            return
+        if chunk:
+            yield _score_batch_chunk(current_engine, pack, chunk)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _admin_denied(require_registry=True):
+    """Error response unless the request carries the configured admin token"""
+    token = os.environ.get("SCAM_DETECTOR_ADMIN_TOKEN")
+    if not token:
+        return jsonify({'error': 'Admin API disabled; set SCAM_DETECTOR_ADMIN_TOKEN'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Invalid admin token'}), 401
+    if require_registry and model_registry is None:
+        return jsonify({'error': 'Model registry not enabled'}), 404
+    return None
+
+@app.route('/admin/models')
+def admin_models():
+    """List registry versions and which one is active and served"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    return jsonify({
+        'active': model_registry.active_version(),
+        'served': served_version,
+        'versions': model_registry.versions()
+    })
+
+@app.route('/admin/models/activate', methods=['POST'])
+def admin_activate_model():
+    """Activate a registry version; every worker swaps to it on its next poll"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        model_registry.activate(version)
+        _switch_to_version(version)
+    except (RegistryError, OSError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'active': version, 'served': served_version})
+
+@app.route('/admin/models/rollback', methods=['POST'])
+def admin_rollback_model():
+    """Activate the newest version older than the active one"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        version = model_registry.rollback()
+        _switch_to_version(version)
+    except (RegistryError, OSError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'active': version, 'served': served_version})
+
+@app.route('/admin/keywords', methods=['GET'])
+def admin_keywords():
+    """Describe the keyword pack this worker is using"""
+    denied = _admin_denied(require_registry=False)
+    if denied:
+        return denied
+    return jsonify(feature_extractor.current_pack().describe())
+
+@app.route('/admin/keywords/reload', methods=['POST'])
+def admin_reload_keywords():
+    """Reload the keyword pack file and swap it in if it changed"""
+    denied = _admin_denied(require_registry=False)
+    if denied:
+        return denied
+    try:
+        previous = feature_extractor.current_pack()
+        pack = reload_keyword_pack()
+    except (OSError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'reloaded': pack is not previous, **pack.describe()})
+
+def _is_ready():
+    return engine is not None and warmed_up
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None
+        'model_loaded': engine is not None,
+        'ready': _is_ready(),
+        'training': dict(training_status),
+        'model_version': engine.checksum[:12] if engine is not None else None,
+        'registry_version': served_version,
+        'cache': prediction_cache.stats(),
+        'persistent_cache': persistent_cache.stats() if persistent_cache is not None else None,
+        'keyword_pack': {'version': feature_extractor.current_pack().version,
+                         'sha256': feature_extractor.current_pack().sha256[:12]},
+        'memory': rss_report()
+    })
+
+@app.route('/health/live')
+def health_live():
+    """Liveness probe: the process is up and answering requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness probe: 200 once a model is loaded and warmed up, 503 before"""
+    if not _is_ready():
+        response = jsonify({'status': 'not ready', 'training': dict(training_status)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
+    return jsonify({
+        'status': 'ready',
+        'model_version': engine.checksum[:12],
+        'registry_version': served_version,
     })
 
 if __name__ == '__main__':
     print("🚀 Starting Scam Detector Web Application...")
-    print("📚 Loading model...")
-    load_and_train_model()
+    # The server accepts traffic right away; /predict returns 503 until the model is published
+    create_app(preload=False)
     print("🌐 Starting Flask server on http://localhost:5000")
-    app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=False, host='0.0.0.0', port=5000)
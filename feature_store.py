@@ -0,0 +1,101 @@
+"""Row-level store of extracted training features, so retraining only extracts new rows"""
+import hashlib
+import sqlite3
+
+import numpy as np
+
+import feature_extractor
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    digest BLOB PRIMARY KEY,
+    extractor TEXT NOT NULL,
+    features BLOB NOT NULL
+) WITHOUT ROWID
+"""
+# Stays well below SQLite's limit on bound parameters per statement
+_LOOKUP_BATCH = 900
+_FEATURE_DTYPE = np.dtype("<f4")
+
+
+class FeatureStore:
+    """Content-addressed cache of feature rows in a local SQLite file
+
+    Each row is keyed by the BLAKE2b digest of the message text and tagged
+    with the extractor that produced it (the keyword pack hash, which covers
+    the feature schema version). extract() returns stored rows for messages
+    seen before and only runs the extractor on new or changed messages, or
+    on rows stored by another extractor, which it then overwrites. New rows
+    are computed by compute(messages, pack), by default pack.score_batch.
+    """
+
+    def __init__(self, path, compute=None):
+        self.path = path
+        self.compute = compute or (lambda messages, pack: pack.score_batch(messages))
+        self.reused = 0
+        self.extracted = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    @staticmethod
+    def digest(message):
+        return hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+
+    def extract(self, messages, pack=None):
+        """Features for messages as an (n, N_FEATURES) float32 matrix, extracting only unknown rows"""
+        pack = pack or feature_extractor.current_pack()
+        digests = [self.digest(message) for message in messages]
+        stored = self._lookup(pack.sha256, list(dict.fromkeys(digests)))
+
+        out = np.empty((len(messages), feature_extractor.N_FEATURES), dtype=np.float32)
+        hit_rows, hit_blobs = [], []
+        missing = {}
+        for i, (digest, message) in enumerate(zip(digests, messages)):
+            blob = stored.get(digest)
+            if blob is None:
+                missing.setdefault(digest, message)
+            else:
+                hit_rows.append(i)
+                hit_blobs.append(blob)
+        if hit_rows:
+            out[hit_rows] = np.frombuffer(b"".join(hit_blobs), dtype=_FEATURE_DTYPE).reshape(len(hit_rows), -1)
+
+        if missing:
+            computed = self.compute(list(missing.values()), pack)
+            position = {digest: j for j, digest in enumerate(missing)}
+            miss_rows = [i for i, digest in enumerate(digests) if digest in position]
+            out[miss_rows] = computed[[position[digests[i]] for i in miss_rows]]
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO features (digest, extractor, features) VALUES (?, ?, ?)",
+                    ((digest, pack.sha256, computed[j].astype(_FEATURE_DTYPE).tobytes())
+                     for digest, j in position.items()),
+                )
+        self.reused += len(hit_rows)
+        self.extracted += len(missing)
+        return out
+
+    def _lookup(self, extractor, digests):
+        stored = {}
+        for start in range(0, len(digests), _LOOKUP_BATCH):
+            batch = digests[start:start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            stored.update(self._db.execute(
+                f"SELECT digest, features FROM features WHERE extractor = ? AND digest IN ({placeholders})",
+                (extractor, *batch),
+            ))
+        return stored
+
+    def prune(self, pack=None):
+        """Delete rows stored by any extractor other than pack's"""
+        pack = pack or feature_extractor.current_pack()
+        with self._db:
+            self._db.execute("DELETE FROM features WHERE extractor != ?", (pack.sha256,))
+
+    def close(self):
+        self._db.close()
+
+    def stats(self):
+        return {'path': self.path, 'reused': self.reused, 'extracted': self.extracted}
@@ -0,0 +1,327 @@
+"""Flat-array inference for a trained RandomForestClassifier
+
+Compiled forests are stored in a small binary format that can be loaded and
+scored with NumPy alone (no sklearn, joblib or pickle). All integers are
+little-endian. The file starts with a 128-byte header, zero padded:
+
+    offset  size  field
+    0       8     magic b"SCAMFRST"
+    8       4     format version, uint32 (currently 1)
+    12      4     number of trees, uint32
+    16      8     number of nodes across all trees, uint64
+    24      4     number of classes, uint32
+    28      4     size of the metadata JSON in bytes, uint32
+    32      32    SHA-256 of everything after the header
+
+followed by the UTF-8 metadata JSON (n_features, checksum, source_sha256, ...)
+and these arrays, each starting at a 64-byte aligned file offset:
+
+    classes     int64[classes]        class labels
+    roots       int32[trees]          node id of each tree's root
+    depths      int32[trees]          depth of each tree
+    feature     int32[nodes]          feature tested at each node (0 at leaves)
+    threshold   float64[nodes]        go left when x[feature] <= threshold
+    left        int32[nodes]          left child; leaves point to themselves
+    right       int32[nodes]          right child; leaves point to themselves
+    leaf_proba  float64[nodes, classes]  class probabilities at each node
+
+Node ids are global across the forest. Readers must reject unknown versions.
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+FORMAT_MAGIC = b"SCAMFRST"
+FORMAT_VERSION = 1
+HEADER_SIZE = 128
+_HEADER = struct.Struct("<8sIIQII32s")
+_ALIGNMENT = 64
+
+
+def _padding(offset):
+    return -offset % _ALIGNMENT
+
+
+def write_sections(write, position, arrays):
+    """Write each array at the next aligned file offset after position; returns the end offset
+
+    write(data) appends bytes to a file whose end is at position. Also used
+    by columnar_dataset.py, whose files share this layout.
+    """
+    for array in arrays:
+        data = bytes(_padding(position)) + array.tobytes()
+        write(data)
+        position += len(data)
+    return position
+
+
+def read_sections(path, data, offset, layout, trailing=0):
+    """Views of the arrays write_sections() wrote into data from offset on
+
+    layout lists a (dtype, count) pair per array. Raises ValueError unless
+    exactly trailing bytes follow the last array.
+    """
+    arrays = []
+    for dtype, count in layout:
+        offset += _padding(offset)
+        size = np.dtype(dtype).itemsize * count
+        arrays.append(data[offset:offset + size].view(dtype))
+        offset += size
+    if offset + trailing != len(data):
+        raise ValueError(f"{path} has an unexpected length")
+    return arrays
+
+
+class FlatForest:
+    """A random forest compiled into flat node arrays shared by all trees
+
+    Node ids are global across the forest. Leaves point to themselves on both
+    sides, so every tree can be walked in lockstep for a fixed number of
+    steps. Results match sklearn's predict/predict_proba exactly: inputs are
+    compared as float32 against float64 thresholds and tree probabilities are
+    summed in estimator order before averaging.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_proba, roots, depths, classes,
+                 n_features=None, source=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.depths = depths
+        self.classes = classes
+        self.n_features = n_features
+        # Metadata read from a forest file
+        self.meta = {}
+        self.max_depth = int(depths.max()) if len(depths) else 0
+        self.checksum = self._checksum()
+        # SHA-256 of the sklearn artifact this forest was compiled from, if known
+        self.source = source
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, probas, roots, depths = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.intp) + offset
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            # Classifier trees store per-leaf class fractions, which is exactly
+            # what DecisionTreeClassifier.predict_proba returns.
+            probas.append(tree.value[:, 0, :forest.n_classes_])
+            roots.append(offset)
+            depths.append(tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            depths=np.asarray(depths, dtype=np.intp),
+            classes=np.asarray(forest.classes_),
+            n_features=int(forest.n_features_in_),
+        )
+
+    def _checksum(self):
+        """Hex digest identifying the forest's structure and leaf values
+
+        Arrays are hashed in a fixed dtype, so a forest has the same checksum
+        whether it was compiled in memory or loaded from a file.
+        """
+        digest = hashlib.sha256()
+        for array in (self.feature, self.left, self.right, self.roots, self.classes):
+            digest.update(np.ascontiguousarray(array, dtype="<i8").tobytes())
+        for array in (self.threshold, self.leaf_proba):
+            digest.update(np.ascontiguousarray(array, dtype="<f8").tobytes())
+        return digest.hexdigest()
+
+    def save(self, path, **meta):
+        """Write the forest in the binary format described in the module docstring
+
+        meta is stored as JSON alongside the arrays; source is recorded as
+        source_sha256. The file is written to a temporary name and renamed.
+        """
+        if self.classes.dtype.kind not in "iub":
+            raise ValueError("Only integer class labels can be exported")
+        meta = dict(meta, n_features=self.n_features, checksum=self.checksum)
+        if self.source is not None:
+            meta["source_sha256"] = self.source
+        meta_bytes = json.dumps(meta, sort_keys=True).encode("utf-8")
+        sections = [
+            np.ascontiguousarray(self.classes, dtype="<i8"),
+            np.ascontiguousarray(self.roots, dtype="<i4"),
+            np.ascontiguousarray(self.depths, dtype="<i4"),
+            np.ascontiguousarray(self.feature, dtype="<i4"),
+            np.ascontiguousarray(self.threshold, dtype="<f8"),
+            np.ascontiguousarray(self.left, dtype="<i4"),
+            np.ascontiguousarray(self.right, dtype="<i4"),
+            np.ascontiguousarray(self.leaf_proba, dtype="<f8"),
+        ]
+        payload = bytearray(meta_bytes)
+        write_sections(payload.extend, HEADER_SIZE + len(payload), sections)
+        header = _HEADER.pack(
+            FORMAT_MAGIC, FORMAT_VERSION, len(self.roots), len(self.feature),
+            self.leaf_proba.shape[1], len(meta_bytes), hashlib.sha256(payload).digest(),
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=True, verify=True):
+        """Load a forest written by save(); needs nothing beyond NumPy
+
+        With mmap=True the node arrays are read-only memory maps of the file,
+        so every process serving the same file shares one copy in the page
+        cache. verify=True checks the payload against the header's SHA-256.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is too short to be a forest file")
+        magic, version, n_trees, n_nodes, n_classes, meta_size, sha256 = _HEADER.unpack_from(header)
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"{path} is not a forest file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses forest format version {version}, expected {FORMAT_VERSION}")
+
+        data = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+        payload = data[HEADER_SIZE:]
+        if verify and hashlib.sha256(payload).digest() != sha256:
+            raise ValueError(f"Checksum mismatch in {path}")
+        meta = json.loads(bytes(payload[:meta_size]).decode("utf-8"))
+
+        classes, roots, depths, feature, threshold, left, right, leaf_proba = read_sections(
+            path, data, HEADER_SIZE + meta_size,
+            (("<i8", n_classes), ("<i4", n_trees), ("<i4", n_trees), ("<i4", n_nodes),
+             ("<f8", n_nodes), ("<i4", n_nodes), ("<i4", n_nodes), ("<f8", n_nodes * n_classes)),
+        )
+
+        forest = cls(
+            feature=feature, threshold=threshold, left=left, right=right,
+            leaf_proba=leaf_proba.reshape(n_nodes, n_classes), roots=roots, depths=depths,
+            classes=np.array(classes), n_features=meta.get("n_features"),
+            source=meta.get("source_sha256"),
+        )
+        forest.meta = meta
+        return forest
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _leaves_one(self, x):
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            go_left = x[self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_one(self, x):
+        """Return (label, class probabilities) for a single feature row"""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        # cumsum adds tree probabilities strictly in order, like sklearn does
+        proba = np.cumsum(self.leaf_proba[self._leaves_one(x)], axis=0)[-1]
+        proba /= self.n_estimators
+        return self.classes[np.argmax(proba)], proba
+
+    def predict_proba(self, X):
+        """Return class probabilities for a (n, features) matrix"""
+        # Walk one tree at a time over all rows; columns of X.T are contiguous
+        columns = np.ascontiguousarray(np.asarray(X, dtype=np.float32).T)
+        rows = np.arange(columns.shape[1])
+        proba = np.zeros((columns.shape[1], self.leaf_proba.shape[1]), dtype=np.float64)
+        for root, depth in zip(self.roots, self.depths):
+            nodes = np.full(columns.shape[1], root, dtype=np.intp)
+            for _ in range(depth):
+                go_left = columns[self.feature[nodes], rows] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            proba += self.leaf_proba[nodes]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        """Return (labels, class probabilities) for a (n, features) matrix"""
+        proba = self.predict_proba(X)
+        return self.classes.take(np.argmax(proba, axis=1)), proba
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sidecar_meta(model_path, source_sha256):
+    """The training fingerprint scam_detector.py keeps next to model_path, if it names this pickle"""
+    try:
+        with open(model_path + ".meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and meta.get("model_sha256") == source_sha256 else None
+
+
+def load_mapped(model_path, forest_path=None, source_sha256=None, meta=None):
+    """Memory-map the FlatForest compiled from the sklearn pickle at model_path
+
+    The compiled forest lives in forest_path (default: model_path with a
+    .forest suffix). It is rebuilt from the pickle when missing or when it was
+    compiled from a different artifact, so only the first process to load a new
+    model pays for unpickling sklearn; the rest just map the file. Without the
+    pickle, an existing forest file is served as is.
+
+    A rebuilt forest records meta (the feature schema and keyword hash the
+    model was trained with), by default the .meta.json fingerprint written
+    next to the pickle. Raises ValueError rather than rebuild a forest
+    without it, since its features could not be checked.
+    """
+    forest_path = forest_path or os.path.splitext(model_path)[0] + ".forest"
+    if not os.path.exists(model_path):
+        return FlatForest.load(forest_path)
+    source_sha256 = source_sha256 or file_sha256(model_path)
+    try:
+        forest = FlatForest.load(forest_path)
+        if forest.source == source_sha256:
+            return forest
+    except (OSError, ValueError):
+        pass
+
+    meta = meta if meta is not None else _sidecar_meta(model_path, source_sha256)
+    if meta is None:
+        raise ValueError(f"{model_path} has no training metadata to compile {forest_path} with; retrain it")
+    import joblib
+    forest = FlatForest.from_sklearn(joblib.load(model_path))
+    forest.source = source_sha256
+    forest.save(forest_path, **meta)
+    return FlatForest.load(forest_path)
+
+
+def export_forest(model, model_path, forest_path=None, **meta):
+    """Write the forest file for a fitted model that has been saved to model_path
+
+    Returns the compiled FlatForest. The file records model_path's SHA-256 so
+    load_mapped() can tell it belongs to that pickle.
+    """
+    forest = FlatForest.from_sklearn(model)
+    forest.source = file_sha256(model_path)
+    forest.save(forest_path or os.path.splitext(model_path)[0] + ".forest", **meta)
+    return forest
@@ -0,0 +1,66 @@
+"""Check that a serving process starts within its import-time budget
+
+    python3 import_budget.py --budget-ms 500
+
+imports endpoints.py in several fresh interpreters and fails (exit status 1)
+if the median import time is over budget, or if any training-only module
+was imported along the way. Run it after touching imports in the serving
+path; autoscaling and crash recovery both wait on this cold start.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = "endpoints"
+BUDGET_MS = 500.0
+# Only needed to train or unpickle models, never to serve a compiled forest
+TRAINING_ONLY_MODULES = (
+    "sklearn", "scipy", "joblib", "pandas",
+    "feature_store", "parallel_features", "training_data", "columnar_dataset",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module=MODULE, runs=5):
+    """Median import time in ms over runs fresh interpreters, and any training-only modules loaded"""
+    probe = _PROBE.format(module=module, forbidden=TRAINING_ONLY_MODULES)
+    times = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["ms"])
+        loaded.update(result["loaded"])
+    return statistics.median(times), sorted(loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the serving module")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default=MODULE)
+    args = parser.parse_args()
+
+    median_ms, loaded = measure(args.module, args.runs)
+    print(f"⏱️ import {args.module}: {median_ms:.0f} ms median over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if loaded:
+        print(f"❌ Training-only modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print("❌ Over budget")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    sys.exit(1 if failed else 0)
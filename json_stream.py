@@ -0,0 +1,102 @@
+"""Incremental readers for JSON arrays and NDJSON request bodies"""
+import codecs
+import json
+
+READ_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+def _iter_text(stream, read_size=READ_SIZE):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+
+def iter_ndjson(stream, read_size=READ_SIZE):
+    """Yield one decoded value per non-blank line of an NDJSON byte stream"""
+    pending = ""
+    for text in _iter_text(stream, read_size):
+        pending += text
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Yield the elements of a top-level JSON array without reading it all at once
+
+    Only the current element and one read's worth of lookahead are buffered.
+    Raises ValueError if the body is not a well-formed JSON array.
+    """
+    chunks = _iter_text(stream, read_size)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        text = next(chunks, None)
+        if text is None:
+            eof = True
+            return False
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "]":
+        return
+
+    while True:
+        # A value is only accepted once something other than number characters
+        # follows it, so numbers split across reads are never cut short.
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise ValueError("Malformed JSON array")
+                continue
+            if eof or buffer[end:].strip(_NUMBER_CHARS):
+                break
+            if not fill():
+                break
+        pos = end
+        yield value
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != ",":
+            raise ValueError("Expected ',' or ']' in JSON array")
+        pos += 1
+        skip_whitespace()
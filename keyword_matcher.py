@@ -0,0 +1,203 @@
+"""Single-pass multi-keyword matching for the scam factor extractor"""
+import re
+from collections import deque
+
+import numpy as np
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every keyword in one pass over a text"""
+
+    def __init__(self, keywords):
+        # Duplicate keywords share one pattern id
+        self.keywords = list(dict.fromkeys(keywords))
+
+        goto = [{}]
+        outputs = [set()]
+        for keyword_id, keyword in enumerate(self.keywords):
+            node = 0
+            for ch in keyword:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                node = nxt
+            outputs[node].add(keyword_id)
+
+        # Breadth-first pass: compute failure links and fold them into a full
+        # transition table so scanning never has to follow a failure chain.
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            fallback = delta[fail[node]]
+            delta[node] = {**fallback, **goto[node]}
+            for ch, nxt in goto[node].items():
+                fail[nxt] = fallback.get(ch, 0) if node else 0
+                outputs[nxt] |= outputs[fail[nxt]]
+                queue.append(nxt)
+
+        self._delta = delta
+        self._outputs = [tuple(sorted(out)) for out in outputs]
+
+    def find(self, text):
+        """Return the ids of all keywords occurring in text"""
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        node = 0
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
+
+
+# Words (with inner apostrophes, as in "don't") and currency signs; every
+# other character separates tokens
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)*|[$€£]")
+# Hostnames such as "bit.ly" or "www.fake-promo.win": dot-separated labels
+_HOST_PATTERN = re.compile(r"(?:[^\W_][\w-]*\.)+[^\W_][\w-]*")
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _is_host_keyword(keyword):
+    """Keywords like "bit.ly" or ".win" name hosts or domain suffixes, not words"""
+    if keyword.startswith("."):
+        return _HOST_PATTERN.fullmatch("x" + keyword) is not None
+    return "." in keyword and _HOST_PATTERN.fullmatch(keyword) is not None
+
+
+class TokenMatcher:
+    """Finds keywords that occur as whole tokens or token sequences in a text
+
+    Unlike a substring scan, "now" does not match "know" and "win" does not
+    match "window". The text is tokenized once; single-word keywords are
+    hash lookups and phrases are only compared where their first word
+    occurs, so the cost grows with the number of tokens, not with the
+    keyword count.
+
+    Keywords with a dot are matched against the hostnames in the text
+    instead: ".win" matches a hostname ending in ".win" (but not "win" or
+    "site.winner.com"), and "bit.ly" matches the host bit.ly or any of its
+    subdomains.
+    """
+
+    # Bumped whenever what a keyword matches changes, so pack hashes change too
+    REVISION = 2
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._words = {}
+        self._hosts = []
+        # Phrases are indexed by their first token, so most tokens cost one lookup
+        phrases = {}
+        for keyword_id, keyword in enumerate(self.keywords):
+            if _is_host_keyword(keyword):
+                suffix = keyword if keyword.startswith(".") else "." + keyword
+                self._hosts.append((suffix, keyword.lstrip("."), keyword_id))
+                continue
+            tokens = tuple(tokenize(keyword))
+            if not tokens:
+                raise ValueError(f"Keyword {keyword!r} contains no word to match")
+            if len(tokens) == 1:
+                self._words.setdefault(tokens[0], []).append(keyword_id)
+            else:
+                phrases.setdefault(tokens, []).append(keyword_id)
+        self._phrase_starts = {}
+        for tokens, ids in phrases.items():
+            self._phrase_starts.setdefault(tokens[0], []).append((tokens, len(tokens), tuple(ids)))
+
+    def find(self, text):
+        """Return the ids of all keywords occurring in text"""
+        tokens = tokenize(text)
+        found = set()
+        words = self._words
+        phrase_starts = self._phrase_starts
+        for i, token in enumerate(tokens):
+            ids = words.get(token)
+            if ids:
+                found.update(ids)
+            candidates = phrase_starts.get(token)
+            if candidates:
+                for phrase, length, ids in candidates:
+                    if tuple(tokens[i:i + length]) == phrase:
+                        found.update(ids)
+        if self._hosts and "." in text:
+            for host in _HOST_PATTERN.findall(text):
+                for suffix, name, keyword_id in self._hosts:
+                    if host.endswith(suffix) or host == name:
+                        found.add(keyword_id)
+        return found
+
+
+MATCH_MODES = {"substring": KeywordAutomaton, "token": TokenMatcher}
+
+
+class FactorMatcher:
+    """Scores a message against several keyword lists with one automaton scan
+
+    mode "substring" counts a keyword wherever it occurs in the text, mode
+    "token" only where it occurs as whole words (see TokenMatcher).
+    """
+
+    def __init__(self, keyword_lists, mode="substring"):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode {mode!r}; expected one of {', '.join(MATCH_MODES)}")
+        self.mode = mode
+        self.keyword_lists = tuple(tuple(keywords) for keywords in keyword_lists)
+        self.automaton = MATCH_MODES[mode](
+            kw for keywords in self.keyword_lists for kw in keywords
+        )
+
+        # A keyword may appear in several lists (or twice in one list); each
+        # occurrence counts once towards its list, as with the substring scan.
+        index = {kw: i for i, kw in enumerate(self.automaton.keywords)}
+        self._hits = [[] for _ in self.automaton.keywords]
+        for factor, keywords in enumerate(self.keyword_lists):
+            for kw in keywords:
+                self._hits[index[kw]].append(factor)
+        self._hits = tuple(tuple(factors) for factors in self._hits)
+
+        # score_table[factor, n] is the rounded score for n matched keywords,
+        # so batch scoring is a table lookup instead of a division per cell.
+        width = max(len(keywords) for keywords in self.keyword_lists) + 1
+        self._score_table = np.zeros((len(self.keyword_lists), width), dtype=np.float32)
+        for factor, keywords in enumerate(self.keyword_lists):
+            for n in range(len(keywords) + 1):
+                self._score_table[factor, n] = round(n / len(keywords), 2)
+        self._columns = np.arange(len(self.keyword_lists))
+
+    def count(self, message_lower):
+        """Return the number of matched keywords per list"""
+        counts = [0] * len(self.keyword_lists)
+        hits = self._hits
+        for keyword_id in self.automaton.find(message_lower):
+            for factor in hits[keyword_id]:
+                counts[factor] += 1
+        return counts
+
+    def score(self, message_lower):
+        """Return the fraction of each list's keywords found, rounded to 2 places"""
+        return [
+            round(n / len(keywords), 2)
+            for n, keywords in zip(self.count(message_lower), self.keyword_lists)
+        ]
+
+    def score_batch(self, messages):
+        """Score raw messages into a preallocated (n, factors) float32 matrix"""
+        if not hasattr(messages, '__len__'):
+            messages = list(messages)
+        out = np.empty((len(messages), len(self.keyword_lists)), dtype=np.float32)
+        table = self._score_table
+        columns = self._columns
+        for i, message in enumerate(messages):
+            out[i] = table[columns, self.count(message.lower())]
+        return out
@@ -1,58 +1,203 @@
-import csv
+"""Label a dataset of factor scores by thresholding their sum
+
+    python3 label_dataset.py dataset.csv labeled_dataset.csv --threshold 3
+
+reads the input in blocks of whole records, parses each factor column of
+a block as one numeric array, and writes each labeled block as soon as it
+is ready, so memory stays constant however large the input is. With
+--workers above 1 blocks are labeled across a process pool and written in
+input order.
 
-# Load the existing dataset
-input_file = 'dataset.csv'  # Update if needed
-output_file = 'labeled_dataset.csv'
+A row is labeled 1 when its factor scores sum to at least the threshold.
+Cells that are not non-negative numbers count as 0. The label goes into
+the score_label column (see --column). An existing column of that name is
+overwritten, and so is a second "label" column left by earlier versions
+of this script, which is renamed. Otherwise the column is appended. The
+output is written to a temporary file and renamed, so the input may be
+relabeled in place.
+"""
+import argparse
+import csv
+import io
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-# Open the existing dataset for reading
-with open(input_file, mode='r', newline='', encoding='utf-8') as infile:
-    reader = csv.reader(infile)
-    header = next(reader)  # Skip the header row
-    rows = list(reader)
+import numpy as np
 
-# Define the factor columns
-scam_factors_columns = [
+FACTOR_COLUMNS = (
     'urgency', 'money_request', 'official_appearance', 'reward_offer', 'celebrity_reference',
-    'grammar_issues', 'unusual_contact_method', 'pressure_to_act', 'suspicious_link', 'upfront_payment'
-]
+    'grammar_issues', 'unusual_contact_method', 'pressure_to_act', 'suspicious_link', 'upfront_payment',
+)
+DEFAULT_THRESHOLD = 3
+LABEL_COLUMN = "score_label"
+# Characters of CSV text per block handed to a worker
+BLOCK_SIZE = 1 << 20
+
+
+def _number(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return 0.0
+
+
+def parse_scores(cells):
+    """One column of cells as a float64 array; anything but a non-negative number is 0"""
+    try:
+        values = np.array(cells, dtype=np.float64)
+    except ValueError:
+        values = np.fromiter((_number(cell) for cell in cells), dtype=np.float64, count=len(cells))
+    values[~(np.isfinite(values) & (values >= 0))] = 0.0
+    return values
+
+
+def label_rows(rows, factor_indices, threshold):
+    """Labels (int8, 1 at or above threshold) for rows of CSV cells"""
+    width = max(factor_indices) + 1
+    if any(len(row) < width for row in rows):
+        rows = [row + [""] * (width - len(row)) for row in rows]
+    columns = list(zip(*rows))
+    total = np.zeros(len(rows))
+    # Summed column by column, left to right, as the scores were originally added up
+    for i in factor_indices:
+        total += parse_scores(columns[i])
+    return (total >= threshold).astype(np.int8)
 
-# Find the indices of the scam factor columns in the header
-factor_indices = [header.index(factor) for factor in scam_factors_columns]
 
-# Add a new column for "Label" at the end of the header
-header.append('Label')
+def _label_chunk(text, factor_indices, threshold, label_index):
+    """Label the CSV records in text and return (labeled CSV text, rows)"""
+    rows = [row for row in csv.reader(io.StringIO(text, newline="")) if row]
+    if not rows:
+        return "", 0
+    labels = label_rows(rows, factor_indices, threshold)
+    for row, label in zip(rows, labels.tolist()):
+        if label_index < len(row):
+            row[label_index] = label
+        else:
+            row.extend([""] * (label_index - len(row)))
+            row.append(label)
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue(), len(rows)
 
-# Create a new list for storing updated rows
-updated_rows = []
 
-# Define a threshold for labeling a message as a scam
-threshold = 3  # You can adjust this threshold as needed
+def _record_end(text, start=0):
+    """Index just past the first complete record in text[start:], or -1
 
-# Process each row to compute the scam score and assign the label
-for row in rows:
+    A newline ends a record when the quotes before it are balanced;
+    doubled quotes inside a field keep the count even.
+    """
+    end = text.find("\n", start)
+    while end != -1 and text.count('"', start, end) % 2:
+        end = text.find("\n", end + 1)
+    return end + 1 if end != -1 else -1
+
+
+def iter_record_blocks(f, block_size):
+    """Yield roughly block_size characters of f at a time, always cut between records"""
+    rest = ""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            if rest:
+                yield rest
+            return
+        text = rest + block
+        cut = text.rfind("\n")
+        while cut != -1 and text.count('"', 0, cut) % 2:
+            cut = text.rfind("\n", 0, cut)
+        if cut == -1:
+            rest = text  # one record longer than a block
+            continue
+        yield text[:cut + 1]
+        rest = text[cut + 1:]
+
+
+def output_header(header, column=LABEL_COLUMN):
+    """The output header and the index the label is written to"""
+    header = list(header)
+    if column in header:
+        return header, header.index(column)
+    labels = [i for i, name in enumerate(header) if name == "label"]
+    if len(labels) > 1:
+        header[labels[-1]] = column
+        return header, labels[-1]
+    return header + [column], len(header)
+
+
+def label_file(input_path, output_path, threshold=DEFAULT_THRESHOLD, column=LABEL_COLUMN,
+               workers=1, block_size=BLOCK_SIZE):
+    """Stream input_path into output_path with a label column added; returns (rows, seconds)
+
+    The input is cut into blocks of whole records without parsing it, so
+    with workers above 1 the CSV parsing, labeling and formatting all run
+    in the process pool, with at most two blocks per worker in flight.
+    """
+    started = time.perf_counter()
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    total = 0
     try:
-        # Calculate the total scam score by summing the values in the scam factor columns
-        total_scam_score = sum(
-            float(row[i]) if row[i].replace('.', '', 1).isdigit() else 0  # Handle non-numeric values
-            for i in factor_indices
-        )
-        
-        # Assign a label based on the total scam score
-        label = 1 if total_scam_score >= threshold else 0
-        row.append(label)  # Append the label to the row
-        
-    except Exception as e:
-        print(f"Error processing row: {row} - {e}")
-        row.append(0)  # Append label as 0 if there's an error in processing the row
-
-    # Add the updated row to the list
-    updated_rows.append(row)
-
-# Write the updated rows to a new CSV file
-with open(output_file, mode='w', newline='', encoding='utf-8') as outfile:
-    writer = csv.writer(outfile)
-    writer.writerow(header)  # Write the header
-    writer.writerows(updated_rows)  # Write the updated rows
-
-print(f"✅ Labeled dataset saved as '{output_file}'")
+        with open(input_path, newline="", encoding="utf-8") as infile, \
+                open(tmp_path, "w", newline="", encoding="utf-8") as outfile:
+            blocks = iter_record_blocks(infile, block_size)
+            first = next(blocks, "")
+            header_end = _record_end(first)
+            if header_end == -1:
+                header_end = len(first)
+            header = next(csv.reader([first[:header_end]]), [])
+            missing = [factor for factor in FACTOR_COLUMNS if factor not in header]
+            if missing:
+                raise ValueError(f"{input_path} has no {', '.join(missing)} column")
+            factor_indices = [header.index(factor) for factor in FACTOR_COLUMNS]
+            header, label_index = output_header(header, column)
+            csv.writer(outfile).writerow(header)
+
+            blocks = itertools.chain([first[header_end:]], blocks)
+            if workers == 1:
+                for block in blocks:
+                    text, rows = _label_chunk(block, factor_indices, threshold, label_index)
+                    outfile.write(text)
+                    total += rows
+            else:
+                with ProcessPoolExecutor(workers) as pool:
+                    in_flight = deque()
+
+                    def write_oldest():
+                        nonlocal total
+                        text, rows = in_flight.popleft().result()
+                        outfile.write(text)
+                        total += rows
+
+                    for block in blocks:
+                        in_flight.append(pool.submit(_label_chunk, block, factor_indices, threshold, label_index))
+                        if len(in_flight) >= 2 * workers:
+                            write_oldest()
+                    while in_flight:
+                        write_oldest()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, output_path)
+    return total, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label messages by thresholding the sum of their factor scores")
+    parser.add_argument("input", nargs="?", default="dataset.csv")
+    parser.add_argument("output", nargs="?", default="labeled_dataset.csv")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="factor score sum at which a message is labeled 1 (default: %(default)s)")
+    parser.add_argument("--column", default=LABEL_COLUMN, help="name of the label column (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="labeling processes (0: CPU count)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE,
+                        help="characters of input per block (default: %(default)s)")
+    args = parser.parse_args()
 
+    rows, elapsed = label_file(args.input, args.output, args.threshold, args.column,
+                               workers=args.workers or os.cpu_count() or 1, block_size=args.block_size)
+    print(f"✅ Labeled {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"saved as '{args.output}'")
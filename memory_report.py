@@ -0,0 +1,100 @@
+"""Per-process memory figures, and a comparison of model loading strategies
+
+    python3 memory_report.py scam_detector_model.pkl --workers 4
+
+starts the given number of worker processes twice: once unpickling the
+sklearn model in every worker, once memory-mapping the compiled FlatForest.
+It prints each worker's RSS and PSS (resident memory with shared pages split
+between the processes sharing them) for both strategies.
+"""
+import argparse
+import multiprocessing
+import os
+
+
+def _status_kb(path, fields):
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def rss_report(pid="self"):
+    """Memory figures for a process in MiB; detailed on Linux, peak RSS on other POSIX systems
+
+    Returns an empty report where neither is available (Windows).
+    """
+    status = _status_kb(f"/proc/{pid}/status", {"VmRSS", "RssAnon", "RssFile", "RssShmem"})
+    if not status:
+        try:
+            import resource
+        except ImportError:  # POSIX only
+            return {}
+        # ru_maxrss is KiB on Linux and bytes on macOS; only reached off Linux
+        return {'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20, 1)}
+    report = {
+        'rss_mb': round(status.get("VmRSS", 0) / 1024, 1),
+        'anon_mb': round(status.get("RssAnon", 0) / 1024, 1),
+        'file_mb': round(status.get("RssFile", 0) / 1024, 1),
+    }
+    pss = _status_kb(f"/proc/{pid}/smaps_rollup", {"Pss"})
+    if pss:
+        report['pss_mb'] = round(pss["Pss"] / 1024, 1)
+    return report
+
+
+def _worker(strategy, model_path, ready, done, results):
+    import numpy as np
+    before = rss_report()
+    if strategy == "pickle":
+        import joblib
+        from forest_engine import FlatForest
+        # What a worker did before: its own sklearn model plus a private engine
+        model = joblib.load(model_path)
+        forest = FlatForest.from_sklearn(model)
+    else:
+        from forest_engine import load_mapped
+        forest = load_mapped(model_path)
+    # Score random 10-factor rows so most node pages are actually resident
+    forest.predict_proba(np.random.rand(2048, 10).astype(np.float32))
+    ready.release()
+    done.wait()
+    results.put((os.getpid(), before, rss_report()))
+
+
+def compare(model_path, workers):
+    from forest_engine import load_mapped
+    load_mapped(model_path)  # make sure the compiled file exists before timing workers
+    context = multiprocessing.get_context("spawn")
+    for strategy in ("pickle", "mmap"):
+        ready = context.Semaphore(0)
+        done = context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=_worker, args=(strategy, model_path, ready, done, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.acquire()
+        # Every worker holds its model while PSS is sampled, so sharing shows up
+        done.set()
+        rows = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        print(f"\n{strategy}:")
+        for pid, before, after in rows:
+            print(f"  worker {pid}: before {before}  after {after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-worker memory for pickled vs memory-mapped models")
+    parser.add_argument("model", help="sklearn model pickle, e.g. scam_detector_model.pkl")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    compare(args.model, args.workers)
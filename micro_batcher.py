@@ -0,0 +1,100 @@
+"""Micro-batching scheduler that groups concurrent predictions into one model call"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class QueueFull(Exception):
+    """Raised when the scheduler already holds max_queue pending rows"""
+
+
+class MicroBatcher:
+    """Collects single feature rows from many threads and scores them together
+
+    A background thread takes the first pending row, then keeps collecting
+    until max_batch_size rows are waiting or max_wait seconds have passed,
+    and hands the stacked (n, n_features) float32 matrix to
+    predict_batch(engine, X), once for each engine the rows were submitted
+    with. predict_batch must return (labels, probabilities) indexed by row;
+    each caller's future receives its own (label, probabilities) pair.
+    """
+
+    def __init__(self, predict_batch, n_features, max_batch_size=32, max_wait=0.002, max_queue=1024):
+        self.predict_batch = predict_batch
+        self.n_features = n_features
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, features, engine):
+        """Queue one feature row to be scored by engine; returns a Future for its (label, probabilities)"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        try:
+            self._queue.put_nowait((features, engine, future))
+        except queue.Full:
+            raise QueueFull(f"{self._queue.maxsize} predictions already pending")
+        return future
+
+    def predict(self, features, engine, timeout=None):
+        """Score one feature row with engine, blocking until its batch has been evaluated"""
+        return self.submit(features, engine).result(timeout)
+
+    def close(self):
+        """Flush pending rows and stop the scheduler thread"""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch):
+        # Rows submitted around a model swap are scored by the engine each was pinned to
+        groups = {}
+        for features, engine, future in batch:
+            groups.setdefault(id(engine), (engine, []))[1].append((features, future))
+        for engine, rows in groups.values():
+            X = np.empty((len(rows), self.n_features), dtype=np.float32)
+            for i, (features, _) in enumerate(rows):
+                X[i] = features
+            try:
+                labels, proba = self.predict_batch(engine, X)
+            except Exception as e:
+                for _, future in rows:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(rows)
+            for i, (_, future) in enumerate(rows):
+                future.set_result((labels[i], proba[i]))
@@ -0,0 +1,202 @@
+"""Directory of versioned, checksummed model artifacts with an active-version pointer
+
+Layout::
+
+    models/
+        ACTIVE              name of the active version, e.g. "v0003"
+        v0001/model.pkl
+        v0001/meta.json     {"version", "sha256", "size", "created_at", ...}
+        v0001/model.forest  FlatForest compiled on first load, memory-mapped by workers
+        v0002/...
+
+Versions are written to a temporary directory and renamed into place, and the
+pointer is replaced atomically, so readers only ever see complete artifacts.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from forest_engine import file_sha256, load_mapped
+
+ARTIFACT_NAME = "model.pkl"
+FOREST_NAME = "model.forest"
+META_NAME = "meta.json"
+POINTER_NAME = "ACTIVE"
+_VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+
+class RegistryError(Exception):
+    """Raised for unknown versions, corrupt artifacts or an empty registry"""
+
+
+class ModelRegistry:
+    """check_meta(meta), if given, raises ValueError for versions this build must not serve"""
+
+    def __init__(self, root, check_meta=None):
+        self.root = root
+        self.check_meta = check_meta
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _version_dir(self, version):
+        if not _VERSION_PATTERN.match(version or ""):
+            raise RegistryError(f"Invalid version name: {version!r}")
+        return os.path.join(self.root, version)
+
+    def version_names(self):
+        """All published versions, oldest first"""
+        names = [name for name in os.listdir(self.root)
+                 if _VERSION_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name))]
+        return sorted(names, key=lambda name: int(name[1:]))
+
+    def versions(self):
+        """Metadata for every published version, oldest first, flagging the active one"""
+        active = self.active_version()
+        result = []
+        for name in self.version_names():
+            meta = self.meta(name)
+            meta["active"] = name == active
+            result.append(meta)
+        return result
+
+    def meta(self, version):
+        with open(os.path.join(self._version_dir(version), META_NAME), encoding="utf-8") as f:
+            return json.load(f)
+
+    def artifact_path(self, version):
+        return os.path.join(self._version_dir(version), ARTIFACT_NAME)
+
+    def active_version(self):
+        """Name of the active version, or None if nothing has been activated"""
+        try:
+            with open(os.path.join(self.root, POINTER_NAME), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, model, activate=True, **meta):
+        """Store model as a new version and optionally make it active; returns the version"""
+        import joblib
+
+        with tempfile.TemporaryDirectory(dir=self.root) as tmp:
+            path = os.path.join(tmp, ARTIFACT_NAME)
+            joblib.dump(model, path)
+            return self.publish_file(path, activate=activate, **meta)
+
+    def publish_file(self, path, activate=True, **meta):
+        """Copy an existing model artifact in as a new version; returns the version"""
+        with self._lock:
+            existing = self.version_names()
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+            staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.root)
+            try:
+                artifact = os.path.join(staging, ARTIFACT_NAME)
+                shutil.copyfile(path, artifact)
+                meta.update(
+                    version=version,
+                    sha256=file_sha256(artifact),
+                    size=os.path.getsize(artifact),
+                    created_at=time.time(),
+                )
+                with open(os.path.join(staging, META_NAME), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, indent=2)
+                # mkdtemp creates the directory owner-only
+                os.chmod(staging, 0o755)
+                os.rename(staging, self._version_dir(version))
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def verify(self, version):
+        """Raise RegistryError unless the version's artifact matches its recorded checksum and check_meta"""
+        try:
+            meta = self.meta(version)
+            expected = meta["sha256"]
+            actual = file_sha256(self.artifact_path(version))
+        except (OSError, ValueError, KeyError) as e:
+            raise RegistryError(f"Version {version} is unreadable: {e}")
+        if actual != expected:
+            raise RegistryError(f"Checksum mismatch for {version}")
+        if self.check_meta is not None:
+            try:
+                self.check_meta(meta)
+            except ValueError as e:
+                raise RegistryError(f"Version {version} is incompatible: {e}")
+
+    def activate(self, version):
+        """Point ACTIVE at version after verifying its artifact"""
+        self.verify(version)
+        pointer = os.path.join(self.root, POINTER_NAME)
+        tmp_pointer = f"{pointer}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_pointer, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp_pointer, pointer)
+
+    def rollback(self):
+        """Activate the newest version older than the active one; returns it"""
+        active = self.active_version()
+        if active is None:
+            raise RegistryError("No active version to roll back from")
+        older = [name for name in self.version_names() if int(name[1:]) < int(active[1:])]
+        if not older:
+            raise RegistryError(f"No version older than {active}")
+        self.activate(older[-1])
+        return older[-1]
+
+    def load(self, version):
+        """Verify and unpickle the model stored as version"""
+        import joblib
+
+        self.verify(version)
+        return joblib.load(self.artifact_path(version))
+
+    def load_engine(self, version):
+        """Verify version and memory-map its compiled FlatForest, compiling it on first use"""
+        self.verify(version)
+        return load_mapped(
+            self.artifact_path(version),
+            os.path.join(self._version_dir(version), FOREST_NAME),
+            source_sha256=self.meta(version)["sha256"],
+            meta=self.meta(version),
+        )
+
+
+class RegistryWatcher:
+    """Polls the ACTIVE pointer and calls on_change(version) whenever it moves"""
+
+    def __init__(self, registry, on_change, interval=1.0, current=None):
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval
+        self.current = current
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            version = self.registry.active_version()
+            if version is None or version in (self.current, self._failed):
+                continue
+            try:
+                self.on_change(version)
+                self.current = version
+            except Exception as e:
+                # Keep serving the current model until the pointer moves again
+                self._failed = version
+                print(f"⚠️ Could not switch to model {version}: {e}")
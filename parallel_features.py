@@ -0,0 +1,104 @@
+"""Feature extraction spread across a process pool, for training on large datasets
+
+Keyword matching is pure Python, so one process extracts features on one
+core however many threads it runs. ParallelExtractor splits a batch of
+messages into chunks and hands them to worker processes, which write their
+rows straight into a shared-memory output matrix. Only the messages travel
+to the workers; the features are copied out once, when the batch is done.
+Batches smaller than min_rows are extracted serially in the calling
+process, where starting the pool would cost more than it saves.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import feature_extractor
+from feature_extractor import FACTOR_NAMES, N_FEATURES, KeywordPack
+
+MIN_PARALLEL_ROWS = 5000
+# Smallest chunk handed to a worker, so dispatch stays cheap next to extraction
+MIN_CHUNK_ROWS = 500
+
+_worker_pack = None
+
+
+def _init_worker(factors, version, match):
+    global _worker_pack
+    _worker_pack = KeywordPack(factors, version=version, match=match)
+
+
+def _extract_into(name, n_rows, start, messages):
+    """Write the features of messages into rows start.. of the shared matrix called name"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray((n_rows, N_FEATURES), dtype=np.float32, buffer=block.buf)
+        out[start:start + len(messages)] = _worker_pack.score_batch(messages)
+        del out  # the view must go before the block can close
+    finally:
+        block.close()
+
+
+class ParallelExtractor:
+    """Callable extract(messages, pack=None) backed by a pool of worker processes
+
+    workers defaults to the CPU count; with 1 everything runs serially. The
+    pool is started on the first batch large enough to need it, and
+    restarted if a batch uses another keyword pack. Workers come from a
+    fork server where available, since training may run on a background
+    thread of the web app and forking a threaded process is unsafe.
+    """
+
+    def __init__(self, workers=None, min_rows=MIN_PARALLEL_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self._pool = None
+        self._pool_pack = None
+
+    def __call__(self, messages, pack=None):
+        pack = pack or feature_extractor.current_pack()
+        if self.workers == 1 or len(messages) < self.min_rows:
+            return pack.score_batch(messages)
+
+        pool = self._pool_for(pack)
+        n_rows = len(messages)
+        chunk_rows = max(MIN_CHUNK_ROWS, -(-n_rows // (4 * self.workers)))
+        block = shared_memory.SharedMemory(create=True, size=n_rows * N_FEATURES * 4)
+        try:
+            futures = [pool.submit(_extract_into, block.name, n_rows, start, messages[start:start + chunk_rows])
+                       for start in range(0, n_rows, chunk_rows)]
+            for future in futures:
+                future.result()
+            out = np.ndarray((n_rows, N_FEATURES), dtype=np.float32, buffer=block.buf)
+            features = out.copy()
+            del out
+        finally:
+            block.close()
+            block.unlink()
+        return features
+
+    def _pool_for(self, pack):
+        if self._pool is not None and self._pool_pack != pack.sha256:
+            self.close()
+        if self._pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            factors = dict(zip(FACTOR_NAMES, (list(keywords) for keywords in pack.keywords)))
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                             initargs=(factors, pack.version, pack.match))
+            self._pool_pack = pack.sha256
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_pack = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,136 @@
+"""SQLite-backed prediction cache that survives restarts"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    model TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    result TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (model, digest)
+) WITHOUT ROWID
+"""
+
+
+class PersistentPredictionCache:
+    """Read-through cache of prediction results stored in a local SQLite file
+
+    Keys are the (model_version, digest) pairs produced by PredictionCache.key.
+    Lookups run on a shared connection; inserts and hit counts are queued and
+    written by a background thread in batched transactions, so request
+    threads never wait on disk writes.
+    """
+
+    def __init__(self, path, flush_interval=0.5, flush_size=256, max_pending=10000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+        setup = sqlite3.connect(path)
+        setup.execute("PRAGMA journal_mode=WAL")
+        setup.execute(_SCHEMA)
+        setup.commit()
+        setup.close()
+
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader_lock = threading.Lock()
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_loop, name="prediction-cache-writer", daemon=True)
+        self._writer.start()
+
+    def get(self, key):
+        """Return the stored result for key, or None"""
+        model_version, digest = key
+        with self._reader_lock:
+            row = self._reader.execute(
+                "SELECT result FROM predictions WHERE model = ? AND digest = ?",
+                (model_version, digest),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._enqueue(("hit", model_version, digest))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """Queue result to be written under key; dropped if the writer is backed up"""
+        model_version, digest = key
+        self._enqueue(("put", model_version, digest, json.dumps(result)))
+
+    def warm(self, model_version, limit):
+        """Return the limit most frequently hit (key, result) pairs for model_version"""
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT digest, result FROM predictions WHERE model = ? ORDER BY hits DESC LIMIT ?",
+                (model_version, limit),
+            ).fetchall()
+        return [((model_version, digest), json.loads(result)) for digest, result in rows]
+
+    def prune(self, keep_model_version):
+        """Delete entries written for any model other than keep_model_version"""
+        with self._reader_lock:
+            with self._reader:
+                self._reader.execute("DELETE FROM predictions WHERE model != ?", (keep_model_version,))
+
+    def close(self):
+        """Write out everything still queued and stop the writer thread"""
+        self._pending.put(None)
+        self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'pending_writes': self._pending.qsize(),
+            'dropped_writes': self.dropped,
+        }
+
+    def _enqueue(self, item):
+        try:
+            self._pending.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        connection = sqlite3.connect(self.path)
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size:
+                try:
+                    item = self._pending.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write(connection, batch)
+        connection.close()
+
+    @staticmethod
+    def _write(connection, batch):
+        puts = [item[1:] for item in batch if item[0] == "put"]
+        hits = [item[1:] for item in batch if item[0] == "hit"]
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO predictions (model, digest, result) VALUES (?, ?, ?)",
+                puts,
+            )
+            connection.executemany(
+                "UPDATE predictions SET hits = hits + 1 WHERE model = ? AND digest = ?",
+                hits,
+            )
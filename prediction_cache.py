@@ -0,0 +1,92 @@
+"""Bounded in-process LRU cache of prediction results"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+
+def _result_size(key, result):
+    """Approximate memory held by one cache entry, in bytes"""
+    size = sys.getsizeof(key) + sys.getsizeof(result)
+    for name, value in result.items():
+        size += sys.getsizeof(name) + sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class PredictionCache:
+    """LRU cache of /predict results keyed by message hash and model version
+
+    Bounded both by entry count and by an approximate byte budget; the least
+    recently used entries are evicted first. max_entries=0 disables caching.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(message, model_version):
+        """Cache key for message as scored by the model identified by model_version"""
+        digest = hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+        return model_version, digest
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        """Store result under key, evicting least recently used entries as needed"""
+        if self.max_entries <= 0:
+            return
+        size = _result_size(key, result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (result, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the served model changes"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters suitable for a health or metrics endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,106 +1,32 @@
+import argparse
+import contextlib
 import csv
-import re
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-from sklearn.feature_extraction.text import CountVectorizer
-import joblib
-
-def load_csv_data(filename):
-    with open(filename, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        return [row for row in reader]
-
-def preprocess_data(data):
-    messages = [row[0] for row in data]
-    labels = [1 if row[1].lower() == "scam" else 0 for row in data]
-    features = [assign_values_to_factors(message) for message in messages]
-    return features, labels
-
-def assign_values_to_factors(message):
-    message_lower = message.lower()
-
-    def score_from_keywords(keywords):
-        return sum(1 for kw in keywords if kw in message_lower) / len(keywords)
-
-    urgency_keywords = [
-        "urgent", "immediately", "asap", "now", "instantly", "right away", "critical",
-        "emergency", "act fast", "without delay", "rush", "time sensitive", "immediate attention",
-        "important", "priority", "respond quickly", "final notice", "quickly", "within hours", "last chance"
-    ]
-
-    money_keywords = [
-        "send money", "payment", "bank account", "transfer", "fund", "financial assistance",
-        "deposit", "remit", "wire", "moneygram", "western union", "btc", "crypto", "currency",
-        "dollars", "cash", "fee", "transaction", "cheque", "inheritance", "unclaimed funds", "reward",
-        "$", "million", "billion", "usd", "50m", "50 million", "50$", "50000", "lot of money", "wealth"
-    ]
-
-    official_keywords = [
-        "official", "government", "irs", "fbi", "customs", "account update", "verification",
-        "authority", "compliance", "legal", "investigation", "officer", "department", "administrator",
-        "state", "national", "hq", "regulation", "policy", "internal audit"
-    ]
-
-    reward_keywords = [
-        "win", "congratulations", "lucky", "jackpot", "lottery", "cash prize", "gift card",
-        "you've won", "sweepstakes", "bingo", "claim prize", "million", "billion", "bonanza",
-        "reward", "exclusive prize", "you qualify", "redeem", "receive funds", "special winner"
-    ]
-
-    celebrity_keywords = [
-        "elon musk", "taylor swift", "jeff bezos", "bill gates", "oprah", "lebron", "cristiano",
-        "selena", "beyonce", "trump", "biden", "modi", "virat", "shahrukh", "kardashian", 
-        "celebrity", "hollywood", "influencer", "verified", "blue tick"
-    ]
-
-    grammar_issues_keywords = [
-        "recieve", "seperated", "definately", "adress", "freind", "untill", "wich", "immediatly",
-        "inconvienent", "completly", "alot", "happend", "beleive", "enviroment", "goverment",
-        "neccessary", "occurence", "seperate", "succesful", "truely"
-    ]
-
-    contact_keywords = [
-        "telegram", "whatsapp", "sms", "text", "chat", "dm", "message me", "contact via app",
-        "reach me", "wechat", "imo", "viber", "signal", "messenger", "snapchat", "facebook",
-        "call this number", "ping me", "alternative number", "line"
-    ]
-
-    pressure_keywords = [
-        "act now", "limited time", "only today", "last chance", "hurry", "urgent deadline",
-        "before it’s too late", "don't miss out", "one-time offer", "expires soon",
-        "final offer", "time running out", "claim fast", "do not delay", "fast response",
-        "limited stock", "urgent response needed", "need quick answer", "instantly confirm", "must act quickly"
-    ]
-
-    link_keywords = [
-        "http", "https", "bit.ly", "tinyurl", "shorturl", "redirect", ".xyz", ".top", ".win",
-        "click here", "open link", "see details", "login page", "promo code", "verify link",
-        "security page", "unusual login", "confirm access", "track order", "claim voucher"
-    ]
-
-    upfront_keywords = [
-        "pay upfront", "advance payment", "initial deposit", "send fee", "registration fee", 
-        "processing charge", "application cost", "service fee", "transfer cost", "one-time charge",
-        "security fee", "membership fee", "setup cost", "handling fee", "deposit first",
-        "pay before", "cash advance", "shipping fee", "booking charge", "consultation fee"
-    ]
-
-    return [
-        round(score_from_keywords(urgency_keywords), 2),
-        round(score_from_keywords(money_keywords), 2),
-        round(score_from_keywords(official_keywords), 2),
-        round(score_from_keywords(reward_keywords), 2),
-        round(score_from_keywords(celebrity_keywords), 2),
-        round(score_from_keywords(grammar_issues_keywords), 2),
-        round(score_from_keywords(contact_keywords), 2),
-        round(score_from_keywords(pressure_keywords), 2),
-        round(score_from_keywords(link_keywords), 2),
-        round(score_from_keywords(upfront_keywords), 2)
-    ]
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from feature_extractor import extract_features_batch, schema_meta
+from feature_store import FeatureStore
+from forest_engine import FlatForest, export_forest, file_sha256, load_mapped
+from parallel_features import ParallelExtractor
+from training_data import load_features
+
+MODEL_PATH = "scam_detector_model.pkl"
+DATASET_PATH = "labeled_dataset.csv"
+FEATURE_STORE_PATH = "scam_detector_features.sqlite3"
+# Bump when the training recipe in train_model changes
+TRAINING_RECIPE = "random_forest:n_estimators=100,random_state=42,test_size=0.2"
 
 def train_model(X, y):
+    # Training-only dependencies are imported here to keep startup fast
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import classification_report
+
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     model = RandomForestClassifier(n_estimators=100, random_state=42)
     model.fit(X_train, y_train)
@@ -109,22 +35,257 @@ def train_model(X, y):
     print(classification_report(y_test, predictions))
     return model
 
-def classify_message(model, message):
-    features = [assign_values_to_factors(message)]
-    prediction = model.predict(features)[0]
+def classify_message(engine, message):
+    features = extract_features_batch([message])
+    labels, _ = engine.predict(features)
+    prediction = labels[0]
     print("\n🤖 Prediction:", "SCAM" if prediction == 1 else "NOT SCAM")
 
-if __name__ == "__main__":
+def training_fingerprint(dataset_path, previous=None):
+    """Describe the inputs a model is trained from: dataset content, keywords and recipe
+
+    The dataset hash from previous is reused when the file's size and mtime are
+    unchanged, so checking a large dataset does not mean re-reading it.
+    """
+    stat = os.stat(dataset_path)
+    if previous and previous.get("dataset_size") == stat.st_size and previous.get("dataset_mtime_ns") == stat.st_mtime_ns:
+        dataset_sha256 = previous["dataset_sha256"]
+    else:
+        dataset_sha256 = file_sha256(dataset_path)
+    return {
+        "dataset_sha256": dataset_sha256,
+        "dataset_size": stat.st_size,
+        "dataset_mtime_ns": stat.st_mtime_ns,
+        **schema_meta(),
+        "recipe": TRAINING_RECIPE,
+    }
+
+def model_identity(model_path, previous=None):
+    """SHA-256, size and mtime of the saved model file, so its meta file can tell it apart
+
+    As with the dataset, the hash from previous is reused while the file's
+    size and mtime are unchanged.
+    """
+    stat = os.stat(model_path)
+    if previous and previous.get("model_size") == stat.st_size and previous.get("model_mtime_ns") == stat.st_mtime_ns:
+        model_sha256 = previous["model_sha256"]
+    else:
+        model_sha256 = file_sha256(model_path)
+    return {"model_sha256": model_sha256, "model_size": stat.st_size, "model_mtime_ns": stat.st_mtime_ns}
+
+def _same_inputs(a, b):
+    return all(a.get(k) == b.get(k) for k in ("dataset_sha256", "feature_schema_version", "keywords_sha256", "recipe"))
+
+def load_fresh_model(model_path, dataset_path):
+    """Return the saved model's FlatForest if it was trained from the current inputs, else None
+
+    The forest file is memory-mapped, so reusing a model never imports sklearn.
+    The meta file must also name the model file's hash: a model saved by
+    another path (the web app trains from its own dataset) is not reused.
+    """
+    try:
+        with open(model_path + ".meta.json", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    current = training_fingerprint(dataset_path, stored)
+    if not _same_inputs(stored, current):
+        return None
+    try:
+        current.update(model_identity(model_path, stored))
+        if current["model_sha256"] != stored.get("model_sha256"):
+            return None
+        engine = load_mapped(model_path, source_sha256=current["model_sha256"])
+    except Exception:
+        return None
+    if current != stored:
+        # Content unchanged but the file was touched: record the new stat so
+        # the next launch can skip hashing again.
+        _write_meta(model_path, current)
+    return engine
+
+def save_model(model, model_path, fingerprint):
+    """Save model, its portable forest file and the fingerprint of its training inputs
+
+    Returns the compiled FlatForest.
+    """
+    import joblib
+    joblib.dump(model, model_path)
+    engine = export_forest(model, model_path, dataset_sha256=fingerprint["dataset_sha256"], **schema_meta())
+    _write_meta(model_path, dict(fingerprint, **model_identity(model_path)))
+    return engine
+
+def _write_meta(model_path, fingerprint):
+    tmp_path = model_path + ".meta.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f, indent=2)
+    os.replace(tmp_path, model_path + ".meta.json")
+
+def iter_messages(path, fmt):
+    """Lazily yield messages from a CSV, JSONL or plain-text file ('-' reads stdin)
+
+    A CSV's first row is a header only if it has a "message" column; otherwise
+    the file has no header and messages are read from the first column.
+    """
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return
+            if "message" in first:
+                column = first.index("message")
+            else:
+                column = 0
+                reader = itertools.chain([first], reader)
+            for row in reader:
+                yield row[column] if column < len(row) else ""
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    yield item.get("message", "") if isinstance(item, dict) else str(item)
+        else:
+            for line in f:
+                yield line.rstrip("\r\n")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _guess_format(path, default):
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".txt": "txt"}.get(extension, default)
+
+_scoring_engine = None
+
+def _init_scoring_worker(forest_path, engine=None):
+    global _scoring_engine
+    # Workers map the compiled forest, so they share its page-cache copy and
+    # never import sklearn
+    _scoring_engine = engine if engine is not None else FlatForest.load(forest_path)
+
+def _score_chunk(start, messages, output_format):
+    """Score one chunk of messages and return its formatted output lines"""
+    features = extract_features_batch(messages)
+    labels, proba = _scoring_engine.predict(features)
+    classes = _scoring_engine.classes.tolist()
+    scam_proba = proba[:, classes.index(1)] if 1 in classes else np.zeros(len(messages))
+    lines = []
+    for index, label, p in zip(itertools.count(start), labels.tolist(), scam_proba.tolist()):
+        prediction = "SCAM" if label == 1 else "NOT SCAM"
+        if output_format == "csv":
+            lines.append(f"{index},{prediction},{p:.4f}\n")
+        else:
+            lines.append(json.dumps({"index": index, "prediction": prediction, "scam_probability": round(p, 4)}) + "\n")
+    return "".join(lines)
+
+def score_file(model_path, input_path, output_path="-", input_format=None, output_format=None,
+               workers=None, chunk_size=5000, engine=None):
+    """Stream messages from input_path through the model and write one prediction per message
+
+    Chunks are scored with the model's compiled .forest file across a process
+    pool, with at most two chunks per worker in flight, so memory stays
+    constant however large the input is. Results are written in input order.
+    engine, an already loaded FlatForest, is used directly when scoring in
+    this process. Returns (messages scored, seconds taken).
+    """
+    forest_path = os.path.splitext(model_path)[0] + ".forest"
+    input_format = input_format or _guess_format(input_path, "jsonl" if input_path == "-" else "txt")
+    output_format = output_format or _guess_format(output_path, "jsonl")
+    workers = workers or os.cpu_count() or 1
+
+    messages = iter_messages(input_path, input_format)
+    chunks = iter(lambda: list(itertools.islice(messages, chunk_size)), [])
+    out = sys.stdout if output_path == "-" else open(output_path, "w", newline="", encoding="utf-8")
+    started = time.perf_counter()
+    total = 0
+    try:
+        if output_format == "csv":
+            out.write("index,prediction,scam_probability\n")
+        if workers == 1:
+            _init_scoring_worker(forest_path, engine)
+            for chunk in chunks:
+                out.write(_score_chunk(total, chunk, output_format))
+                total += len(chunk)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_scoring_worker, initargs=(forest_path,)) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.submit(_score_chunk, total, chunk, output_format))
+                    total += len(chunk)
+                    if len(in_flight) >= 2 * workers:
+                        out.write(in_flight.popleft().result())
+                while in_flight:
+                    out.write(in_flight.popleft().result())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return total, time.perf_counter() - started
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train or reuse the scam detector model and check messages")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="labeled CSV, or its columnar copy, to train from")
+    parser.add_argument("--model", default=MODEL_PATH, help="where the trained model is saved")
+    parser.add_argument("--retrain", action="store_true", help="retrain even if the saved model is up to date")
+    parser.add_argument("--feature-store", default=FEATURE_STORE_PATH,
+                        help="SQLite file caching extracted features per message, so retraining only "
+                             "extracts new rows ('' disables; default: %(default)s)")
+    parser.add_argument("--extract-workers", type=int,
+                        help="feature extraction processes for training (default: CPU count; 1 disables)")
+    bulk = parser.add_argument_group("bulk scoring")
+    bulk.add_argument("--score", metavar="INPUT", help="score every message in INPUT ('-' for stdin) instead of prompting")
+    bulk.add_argument("--input-format", choices=["csv", "jsonl", "txt"], help="INPUT format (default: from extension)")
+    bulk.add_argument("--output", default="-", help="where to write predictions (default: stdout)")
+    bulk.add_argument("--output-format", choices=["csv", "jsonl"], help="output format (default: from extension, else jsonl)")
+    bulk.add_argument("--workers", type=int, help="scoring processes (default: CPU count)")
+    bulk.add_argument("--chunk-size", type=int, default=5000, help="messages per work unit (default: 5000)")
+    return parser.parse_args()
+
+def prepare_model(args):
+    """Load the saved model if it is up to date, otherwise train and save a new one
+
+    Returns the model's FlatForest, which is what messages are classified with.
+    """
+    engine = None if args.retrain else load_fresh_model(args.model, args.dataset)
+    if engine is not None:
+        print(f"✅ Reusing {args.model} (dataset and keywords unchanged)")
+        return engine
     print("📥 Loading data...")
-    data = load_csv_data("labeled_dataset.csv")
-    X, y = preprocess_data(data)
+    fingerprint = training_fingerprint(args.dataset)
+    with ParallelExtractor(args.extract_workers) as extract:
+        if args.feature_store:
+            store = FeatureStore(args.feature_store, compute=extract)
+            try:
+                X, y = load_features(args.dataset, store.extract)
+            finally:
+                store.close()
+            print(f"🗃️ Feature store: {store.reused:,} rows reused, {store.extracted:,} extracted")
+        else:
+            X, y = load_features(args.dataset, extract)
     model = train_model(X, y)
-    joblib.dump(model, "scam_detector_model.pkl")
+    return save_model(model, args.model, fingerprint)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.score:
+        # Keep stdout clean for predictions; progress goes to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            engine = prepare_model(args)
+        total, elapsed = score_file(
+            args.model, args.score, args.output, args.input_format, args.output_format,
+            workers=args.workers, chunk_size=args.chunk_size, engine=engine
+        )
+        rate = total / elapsed if elapsed else 0.0
+        print(f"✅ Scored {total} messages in {elapsed:.2f}s ({rate:,.0f} messages/s)", file=sys.stderr)
+        sys.exit(0)
+
+    engine = prepare_model(args)
 
     # Test input
     while True:
         msg = input("\n💬 Enter a message to check (or 'quit' to exit):\n")
         if msg.lower() == 'quit':
             break
-        classify_message(model, msg)
+        classify_message(engine, msg)
 
@@ -0,0 +1,175 @@
+"""Production launcher: a pre-fork server that loads the model once in the master
+
+    python3 serve.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+The master loads (or trains) the model and runs a warmup before forking, so
+every worker starts ready to answer and shares the model pages copy-on-write
+(and the memory-mapped .forest file through the page cache). Background
+services such as micro-batching, the persistent cache and the registry
+watcher start in each worker after the fork. Gunicorn is used when installed;
+otherwise a small werkzeug-based pre-fork server takes its place.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import endpoints
+
+RESPAWN_DELAY = 1.0
+
+
+def parse_bind(bind):
+    host, _, port = bind.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got {bind!r}")
+    return host.strip("[]"), int(port)
+
+
+def run_gunicorn(bind, workers, threads, warmup_rounds):
+    from gunicorn.app.base import BaseApplication
+
+    class ScamDetectorApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", [bind])
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread" if threads > 1 else "sync")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("post_fork", lambda server, worker: endpoints.start_worker_services())
+
+        def load(self):
+            return endpoints.create_app(start_services=False, warmup_rounds=warmup_rounds)
+
+    ScamDetectorApplication().run()
+
+
+def _make_pooled_server(threads):
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """werkzeug server that handles requests on a fixed-size thread pool"""
+
+        def __init__(self, *args, **kwargs):
+            self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+            super().__init__(*args, **kwargs)
+
+        def process_request(self, request, client_address):
+            self._pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    return PooledWSGIServer
+
+
+def _serve_worker(sock, host, port, app, threads):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    endpoints.start_worker_services()
+    server = _make_pooled_server(threads)(host, port, app, fd=sock.fileno())
+    print(f"👷 Worker {os.getpid()} serving with {threads} threads")
+    server.serve_forever()
+
+
+def run_builtin(bind, workers, threads, warmup_rounds):
+    host, port = parse_bind(bind)
+    if workers <= 1 or not hasattr(os, "fork"):
+        app = endpoints.create_app(warmup_rounds=warmup_rounds)
+        print(f"🌐 Serving on http://{host}:{port} (single process, {threads} threads)")
+        _make_pooled_server(threads)(host, port, app).serve_forever()
+        return
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    app = endpoints.create_app(start_services=False, warmup_rounds=warmup_rounds)
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_worker(sock, host, port, app, threads)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"🌐 Serving on http://{host}:{port} with {workers} workers x {threads} threads")
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+            # Don't spin if workers die straight away, e.g. on a broken deployment
+            time.sleep(RESPAWN_DELAY)
+            spawn()
+    sock.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Scam Detector with several pre-forked workers")
+    parser.add_argument("--bind", default=os.environ.get("SCAM_DETECTOR_BIND", "0.0.0.0:5000"),
+                        help="HOST:PORT to listen on (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SCAM_DETECTOR_WORKERS", os.cpu_count() or 1)),
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("SCAM_DETECTOR_THREADS", "4")),
+                        help="request threads per worker (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=endpoints.WARMUP_ROUNDS,
+                        help="warmup rounds run in the master before forking; 0 disables (default: %(default)s)")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "builtin"),
+                        default=os.environ.get("SCAM_DETECTOR_SERVER", "auto"),
+                        help="gunicorn, the built-in pre-fork server, or gunicorn when installed (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = args.server
+    if server == "auto":
+        try:
+            import gunicorn  # noqa: F401
+            server = "gunicorn"
+        except ImportError:
+            server = "builtin"
+    if server == "gunicorn" and not hasattr(os, "fork"):
+        sys.exit("gunicorn needs a platform with fork(); use --server builtin")
+    print(f"🚀 Starting Scam Detector ({server} server)")
+    if server == "gunicorn":
+        run_gunicorn(args.bind, args.workers, args.threads, args.warmup)
+    else:
+        run_builtin(args.bind, args.workers, args.threads, args.warmup)
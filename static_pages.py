@@ -0,0 +1,56 @@
+"""Pages rendered once and served from memory with ETags and precompressed variants"""
+import gzip
+import hashlib
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip variants are built
+    brotli = None
+
+# Most preferred first; identity is always available
+_ENCODINGS = ("br", "gzip")
+
+
+class CompiledPage:
+    """An HTML page held as bytes, with its gzip and brotli encodings built up front
+
+    Every representation gets its own strong ETag derived from the page's
+    content hash. response() picks the best encoding the client accepts and
+    answers 304 when If-None-Match already names the current page.
+    """
+
+    def __init__(self, html, max_age=300):
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.cache_control = f"public, max-age={max_age}"
+        self.variants = {None: (body, f'"{digest}"')}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        self._etags = {etag for _, etag in self.variants.values()}
+
+    def _choose_encoding(self, accept_encodings):
+        best, best_quality = None, 0
+        for encoding in _ENCODINGS:
+            quality = accept_encodings.quality(encoding)
+            if encoding in self.variants and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def response(self, request):
+        """Flask response for request, honouring Accept-Encoding and If-None-Match"""
+        encoding = self._choose_encoding(request.accept_encodings)
+        body, etag = self.variants[encoding]
+        headers = {
+            'ETag': etag,
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or any(tag.strip() in self._etags for tag in if_none_match.split(',')):
+            return Response(status=304, headers=headers)
+        return Response(body, mimetype='text/html', headers=headers)
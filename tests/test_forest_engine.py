@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import FlatForest
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 10), dtype=np.float32)
+    y = (X[:, 0] + X[:, 3] > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X[:300], y[:300])
+    return model, X[300:]
+
+
+def test_predict_matches_sklearn(fitted):
+    model, X = fitted
+    labels, proba = FlatForest.from_sklearn(model).predict(X)
+    np.testing.assert_array_equal(labels, model.predict(X))
+    np.testing.assert_allclose(proba, model.predict_proba(X))
+
+
+def test_predict_one_matches_sklearn(fitted):
+    model, X = fitted
+    forest = FlatForest.from_sklearn(model)
+    expected_labels, expected_proba = model.predict(X), model.predict_proba(X)
+    for row, expected_label, expected in zip(X, expected_labels, expected_proba):
+        label, proba = forest.predict_one(row)
+        assert label == expected_label
+        np.testing.assert_allclose(proba, expected)
+
+
+def test_save_load_round_trip(fitted, tmp_path):
+    model, X = fitted
+    path = str(tmp_path / "model.forest")
+    FlatForest.from_sklearn(model).save(path, feature_schema_version=1)
+    labels, proba = FlatForest.load(path).predict(X)
+    np.testing.assert_array_equal(labels, model.predict(X))
+    np.testing.assert_allclose(proba, model.predict_proba(X))
@@ -0,0 +1,9 @@
+import import_budget
+
+
+def test_serving_import_stays_within_budget():
+    median_ms, loaded = import_budget.measure()
+    assert loaded == [], f"training-only modules imported by {import_budget.MODULE}: {loaded}"
+    assert median_ms <= import_budget.BUDGET_MS, (
+        f"importing {import_budget.MODULE} took {median_ms:.0f} ms, budget {import_budget.BUDGET_MS:.0f} ms"
+    )
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from keyword_matcher import FactorMatcher
+
+KEYWORD_LISTS = [
+    # overlapping keywords, one a prefix or suffix of another
+    ["pay", "payment", "pay now", "ay", "now"],
+    # a keyword listed twice in one list
+    ["urgent", "act now", "urgent", "immediately"],
+    # keywords shared with other lists
+    ["free", "prize", "now", "pay"],
+    ["free gift", "free", "gift card", "card"],
+]
+
+MESSAGES = [
+    "",
+    "Pay now to claim your FREE gift card prize!",
+    "payment payment payment",
+    "URGENT: act now, act immediately",
+    "freefree giftcard paynow",
+    "nothing to see here",
+    "ayayay nowhere",
+]
+
+
+def naive_score(keyword_lists, message_lower):
+    return [round(sum(1 for kw in keywords if kw in message_lower) / len(keywords), 2)
+            for keywords in keyword_lists]
+
+
+def random_messages(count, seed=0):
+    rng = random.Random(seed)
+    words = [kw for keywords in KEYWORD_LISTS for kw in keywords] + ["a", "the", "yes", " ", "p", "fr"]
+    return ["".join(rng.choice(words) + rng.choice(["", " "]) for _ in range(rng.randint(0, 12)))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("message", MESSAGES + random_messages(200))
+def test_score_matches_naive_substring_scoring(message):
+    matcher = FactorMatcher(KEYWORD_LISTS)
+    message_lower = message.lower()
+    assert matcher.score(message_lower) == naive_score(KEYWORD_LISTS, message_lower)
+
+
+def test_score_batch_matches_naive_substring_scoring():
+    messages = MESSAGES + random_messages(200, seed=1)
+    expected = np.array([naive_score(KEYWORD_LISTS, message.lower()) for message in messages], dtype=np.float32)
+    np.testing.assert_array_equal(FactorMatcher(KEYWORD_LISTS).score_batch(messages), expected)
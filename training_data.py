@@ -0,0 +1,104 @@
+"""Streaming reader for the labeled training corpus
+
+The corpus is read in fixed-size chunks that go straight through the feature
+extractor into preallocated arrays. Only one chunk of message text is held
+at a time, so peak memory depends on the chunk size, not the corpus size.
+Either the labeled CSV or its columnar copy (see columnar_dataset.py) can be
+read; the columnar file is mapped instead of parsed and knows its row count.
+"""
+import csv
+import io
+import os
+import time
+
+import numpy as np
+
+from columnar_dataset import ColumnarDataset, csv_columns, is_columnar, is_scam
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def iter_labeled_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Yield (messages, labels) for up to chunk_size rows at a time from a labeled dataset
+
+    For a CSV, message and label are found by csv_columns(); "scam" is 1,
+    anything else 0.
+    progress(fraction), if given, is called with the share of the file read.
+    """
+    if is_columnar(path):
+        dataset = ColumnarDataset.open(path)
+        for start, chunk in zip(range(0, len(dataset), chunk_size), dataset.iter_chunks(chunk_size)):
+            if progress is not None:
+                progress(min(start + chunk_size, len(dataset)) / len(dataset))
+            yield chunk
+        return
+
+    total_bytes = os.path.getsize(path) or 1
+    with open(path, "rb") as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+        header = next(reader, None)
+        if header is None:
+            return
+        message_column, label_column, width = csv_columns(header)
+
+        messages, labels = [], []
+        for row in reader:
+            if len(row) < width:
+                continue  # blank or truncated line
+            messages.append(row[message_column])
+            labels.append(is_scam(row[label_column]))
+            if len(messages) == chunk_size:
+                if progress is not None:
+                    progress(min(raw.tell() / total_bytes, 1.0))
+                yield messages, np.array(labels, dtype=np.int8)
+                messages, labels = [], []
+        if progress is not None:
+            progress(1.0)
+        if messages:
+            yield messages, np.array(labels, dtype=np.int8)
+
+
+def load_features(path, extract, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Stream a labeled dataset through extract(messages) into one (X, y) pair of arrays
+
+    X is sized exactly for a columnar dataset; for a CSV it is sized from the
+    first chunk's bytes-per-row and grown only if that estimate falls short,
+    then trimmed to the rows actually read. Prints the rows per second achieved.
+    """
+    started = time.perf_counter()
+    total_bytes = os.path.getsize(path)
+    known_rows = len(ColumnarDataset.open(path)) if is_columnar(path) else None
+    X = y = None
+    rows = 0
+    read_fraction = 0.0
+
+    def track(fraction):
+        nonlocal read_fraction
+        read_fraction = fraction
+        if progress is not None:
+            progress(fraction)
+
+    for messages, labels in iter_labeled_chunks(path, chunk_size, track):
+        features = extract(messages)
+        if X is None:
+            if known_rows is not None:
+                capacity = known_rows
+            else:
+                capacity = int(len(messages) / read_fraction * 1.05) + 1 if read_fraction else len(messages)
+            X = np.empty((capacity, features.shape[1]), dtype=np.float32)
+            y = np.empty(capacity, dtype=np.int8)
+        if rows + len(messages) > len(X):
+            capacity = max(2 * len(X), rows + len(messages))
+            X = np.resize(X, (capacity, X.shape[1]))
+            y = np.resize(y, capacity)
+        X[rows:rows + len(messages)] = features
+        y[rows:rows + len(messages)] = labels
+        rows += len(messages)
+
+    if X is None:
+        raise ValueError(f"{path} contains no labeled rows")
+    if rows < len(X):
+        X, y = X[:rows].copy(), y[:rows].copy()
+    elapsed = time.perf_counter() - started
+    print(f"📥 Read {rows:,} rows ({total_bytes / 2**20:.1f} MiB) in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    return X, y